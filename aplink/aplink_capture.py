@@ -0,0 +1,49 @@
+import struct
+import threading
+import time
+from typing import BinaryIO, Iterator, Tuple
+
+MAGIC = b"APLCAP01"
+RX = 0
+TX = 1
+
+# Timestamp in seconds since the capture started, direction, data length
+_RECORD = struct.Struct("<dBI")
+
+class CaptureWriter:
+    """Writes raw link traffic of both directions to a capture file, safe to call from several threads"""
+
+    def __init__(self, path):
+        self._file = open(path, "wb")
+        self._file.write(MAGIC)
+        self._lock = threading.Lock()
+        self._start = time.perf_counter()
+
+    def write(self, direction: int, data: bytes):
+        timestamp = time.perf_counter() - self._start
+        with self._lock:
+            if self._file.closed:
+                return
+            self._file.write(_RECORD.pack(timestamp, direction, len(data)))
+            self._file.write(data)
+
+    def close(self):
+        with self._lock:
+            self._file.close()
+
+def read_capture(f: BinaryIO) -> Iterator[Tuple[float, int, bytes]]:
+    """
+    Read a capture file
+    Yields: (timestamp, direction, data) for every recorded chunk
+    """
+    if f.read(len(MAGIC)) != MAGIC:
+        raise ValueError("Not an APLink capture file")
+    while True:
+        header = f.read(_RECORD.size)
+        if len(header) < _RECORD.size:
+            return
+        timestamp, direction, length = _RECORD.unpack(header)
+        data = f.read(length)
+        if len(data) < length:
+            return # Truncated by a crash while capturing
+        yield timestamp, direction, data
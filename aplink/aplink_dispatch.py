@@ -0,0 +1,56 @@
+import time
+from typing import Callable, Dict, List
+from aplink.aplink_sim_messages import MESSAGE_TYPES
+
+class APLinkDispatcher:
+    """Routes received APLink payloads to subscribers of their message type"""
+
+    def __init__(self, message_types: Dict[int, type] = MESSAGE_TYPES):
+        # Indexed directly by msg_id, which is a single byte on the wire
+        self._decoders = [None] * 256
+        self._subscribers: List[List[Callable]] = [[] for _ in range(256)]
+        self._counts = [0] * 256
+        self._last_counts = [0] * 256
+        self._last_time = time.monotonic()
+        self.unknown = 0
+
+        for msg_id, msg_class in message_types.items():
+            self._decoders[msg_id] = msg_class
+
+    def subscribe(self, msg_class: type, callback: Callable):
+        """Call callback(msg) with a decoded msg_class instance for every message of that type"""
+        self._subscribers[msg_class.msg_id].append(callback)
+
+    def unsubscribe(self, msg_class: type, callback: Callable):
+        self._subscribers[msg_class.msg_id].remove(callback)
+
+    def dispatch(self, payload: bytes, msg_id: int):
+        """Decode a payload and hand it to the subscribers, messages nobody subscribed to are only counted"""
+        decoder = self._decoders[msg_id]
+        if decoder is None:
+            self.unknown += 1
+            return
+
+        self._counts[msg_id] += 1
+        subscribers = self._subscribers[msg_id]
+        if subscribers:
+            msg = decoder()
+            msg.unpack(payload)
+            for callback in subscribers:
+                callback(msg)
+
+    def counts(self) -> Dict[str, int]:
+        """Total number of messages received per message type"""
+        return {decoder.__name__: self._counts[msg_id] for msg_id, decoder in enumerate(self._decoders) if decoder is not None}
+
+    def rates(self) -> Dict[str, float]:
+        """Messages per second per message type since the previous call"""
+        now = time.monotonic()
+        elapsed = max(now - self._last_time, 1e-9)
+        rates = {}
+        for msg_id, decoder in enumerate(self._decoders):
+            if decoder is not None:
+                rates[decoder.__name__] = (self._counts[msg_id] - self._last_counts[msg_id]) / elapsed
+        self._last_counts = list(self._counts)
+        self._last_time = now
+        return rates
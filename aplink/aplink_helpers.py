@@ -1,6 +1,6 @@
 import struct
 import crcmod
-from typing import Optional, Tuple
+from typing import Dict, Iterator, Optional, Tuple
 
 class APLink:
     """Python implementation of the APLink protocol"""
@@ -11,44 +11,92 @@ class APLink:
     MAX_PAYLOAD_LEN = 255
     MAX_PACKET_LEN = MAX_PAYLOAD_LEN + HEADER_LEN + FOOTER_LEN
     
-    def __init__(self):
+    _HEADER = struct.Struct('=BBB')
+    _FOOTER = struct.Struct('>H')
+    
+    def __init__(self, payload_lengths: Optional[Dict[int, int]] = None):
+        """
+        payload_lengths: optional {msg_id: payload length} of the known messages,
+        used by the stream parser to reject corrupted headers straight away
+        """
         self._crc16 = crcmod.mkCrcFun(0x18005, initCrc=0xFFFF, xorOut=0x0000, rev=False)
+        self._payload_lengths = payload_lengths
         self._reset_parser()
+        self.reset_counters()
     
     def _reset_parser(self):
         """Reset the parser state"""
-        self._buffer = bytearray()
-        self._expected_len = 0
-        self._parsing = False
+        self._stream = bytearray()
+    
+    def reset_counters(self):
+        """Reset the stream parser error counters"""
+        self.crc_failures = 0
+        self.resyncs = 0
+        self.bytes_skipped = 0
     
     def parse_byte(self, byte: int) -> Optional[Tuple[bytes, int]]:
         """
         Parse a single byte from the stream
         Returns: (payload, msg_id) if complete message found, None otherwise
         """
-        if not self._parsing and byte == self.START_BYTE:
-            self._parsing = True
-            self._buffer = bytearray([byte])
-            return None
-        
-        if self._parsing:
-            self._buffer.append(byte)
-            
-            # After header, we know the expected length
-            if len(self._buffer) == self.HEADER_LEN:
-                payload_len = self._buffer[1]
-                self._expected_len = self.HEADER_LEN + payload_len + self.FOOTER_LEN
-            
-            # Check if we have a complete packet
-            if len(self._buffer) == self._expected_len:
-                result = self.unpack(bytes(self._buffer))
-                self._reset_parser()
-                return result
+        return next(self.parse_bytes(bytes((byte,))), None)
+    
+    def parse_bytes(self, data: bytes) -> Iterator[Tuple[bytes, int]]:
+        """
+        Parse a chunk of the stream, keeping incomplete packets for the next call
+        Yields: (payload, msg_id) for every complete message found
         
-        return None
+        When a header or checksum is invalid only the start byte is dropped and
+        the following bytes are rescanned, so a valid frame hidden behind a
+        corrupted one is not lost.
+        """
+        buf = self._stream
+        buf += data
+        view = memoryview(buf)
+        pos = 0
+        try:
+            while True:
+                start = buf.find(self.START_BYTE, pos)
+                if start < 0:
+                    self.bytes_skipped += len(buf) - pos
+                    pos = len(buf)
+                    return
+                
+                self.bytes_skipped += start - pos
+                pos = start
+                
+                # Wait for the header to know the expected length
+                if len(buf) - start < self.HEADER_LEN:
+                    return
+                
+                payload_len = buf[start + 1]
+                msg_id = buf[start + 2]
+                if self._payload_lengths is not None and self._payload_lengths.get(msg_id) != payload_len:
+                    self.resyncs += 1
+                    self.bytes_skipped += 1
+                    pos = start + 1
+                    continue
+                
+                end = start + self.HEADER_LEN + payload_len + self.FOOTER_LEN
+                if end > len(buf):
+                    return
+                
+                # Verify checksum (excludes START_BYTE)
+                if self._crc16(view[start + 1:end - 2]) != (buf[end - 2] << 8) | buf[end - 1]:
+                    self.crc_failures += 1
+                    self.resyncs += 1
+                    self.bytes_skipped += 1
+                    pos = start + 1
+                    continue
+                
+                pos = end
+                yield (bytes(view[start + self.HEADER_LEN:end - 2]), msg_id)
+        finally:
+            view.release()
+            del buf[:pos]
     
     def unpack(self, packet: bytes) -> Optional[Tuple[bytes, int]]:
-        """Unpack a complete APLink packet"""
+        """Unpack a complete APLink packet, packet may be any bytes-like object"""
         if len(packet) < self.HEADER_LEN + self.FOOTER_LEN:
             print("aplink len too small")
             return None
@@ -74,7 +122,7 @@ class APLink:
             print(expected_crc, received_crc)
             return None
             
-        payload = packet[self.HEADER_LEN:self.HEADER_LEN+payload_len]
+        payload = bytes(packet[self.HEADER_LEN:self.HEADER_LEN+payload_len])
 
         return (payload, msg_id)
     
@@ -83,12 +131,29 @@ class APLink:
         if len(payload) > self.MAX_PAYLOAD_LEN:
             raise ValueError("Payload too large")
             
-        header = struct.pack('=BBB', self.START_BYTE, len(payload), msg_id)
+        header = self._HEADER.pack(self.START_BYTE, len(payload), msg_id)
         body = header[1:] + payload  # For checksum calculation
         checksum = self._crc16(body)
-        footer = struct.pack('>H', checksum)
+        footer = self._FOOTER.pack(checksum)
         
         return header + payload + footer
+    
+    def pack_into(self, buffer, offset: int, payload_struct: struct.Struct, msg_id: int, *values) -> int:
+        """
+        Encode values with a precompiled payload struct and frame them in place
+        Returns: the number of bytes written to buffer at offset
+        """
+        end = offset + self.HEADER_LEN + payload_struct.size
+        self._HEADER.pack_into(buffer, offset, self.START_BYTE, payload_struct.size, msg_id)
+        payload_struct.pack_into(buffer, offset + self.HEADER_LEN, *values)
+        self._FOOTER.pack_into(buffer, end, self._crc16(memoryview(buffer)[offset + 1:end]))
+        return end + self.FOOTER_LEN - offset
+    
+    def pack_struct(self, payload_struct: struct.Struct, msg_id: int, *values) -> bytes:
+        """Encode values with a precompiled payload struct into a new APLink packet"""
+        buffer = bytearray(self.calculate_packet_size(payload_struct.size))
+        self.pack_into(buffer, 0, payload_struct, msg_id, *values)
+        return bytes(buffer)
 
     def calculate_packet_size(self, payload_len):
         return self.HEADER_LEN + payload_len + self.FOOTER_LEN
\ No newline at end of file
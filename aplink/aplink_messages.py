@@ -4,6 +4,8 @@
 import struct
 from enum import IntEnum
 from aplink.aplink_helpers import APLink
+
+_codec = APLink()
                     
 
 class PARAM_TYPE(IntEnum):
@@ -48,778 +50,421 @@ class LOITER_DIRECTION(IntEnum):
     LEFT = 0,
     
     RIGHT = 1,
-    
- 
 
-        
 class aplink_vehicle_status_full:
-    msg_id = 0  
-                      
-    
-    roll = None             
-    
-    pitch = None             
-    
-    yaw = None             
-    
-    alt = None             
-    
-    spd = None             
-    
-    lat = None             
-    
-    lon = None             
-    
-    mode_id = None             
-    
-    
+    __slots__ = ('roll', 'pitch', 'yaw', 'alt', 'spd', 'lat', 'lon', 'mode_id',)
+    msg_id = 0
+    fmt = struct.Struct("=hhhhhiiB")
+    payload_len = fmt.size
+
+    def __init__(self):
+        self.roll = None
+        self.pitch = None
+        self.yaw = None
+        self.alt = None
+        self.spd = None
+        self.lat = None
+        self.lon = None
+        self.mode_id = None
+
     def unpack(self, payload: bytes):
-        unpack = struct.unpack("=hhhhhiiB", payload)
-        offset = 0
-                    
-        
-        
-        self.roll = unpack[offset]
-        offset += 1
-        
-        
-        
-        self.pitch = unpack[offset]
-        offset += 1
-        
-        
-        
-        self.yaw = unpack[offset]
-        offset += 1
-        
-        
-        
-        self.alt = unpack[offset]
-        offset += 1
-        
-        
-        
-        self.spd = unpack[offset]
-        offset += 1
-        
-        
-        
-        self.lat = unpack[offset]
-        offset += 1
-        
-        
-        
-        self.lon = unpack[offset]
-        offset += 1
-        
-        
-        
-        self.mode_id = unpack[offset]
-        offset += 1
-        
-        
-                    
+        self.roll, self.pitch, self.yaw, self.alt, self.spd, self.lat, self.lon, self.mode_id = self.fmt.unpack(payload)
         return True
-    
-    def pack(self, roll, pitch, yaw, alt, spd, lat, lon, mode_id):
-        payload = struct.pack("=hhhhhiiB", roll, pitch, yaw, alt, spd, lat, lon, mode_id)
-        return APLink().pack(payload, self.msg_id)
-        
+
+    def pack(self, roll, pitch, yaw, alt, spd, lat, lon, mode_id) -> bytes:
+        return _codec.pack_struct(self.fmt, self.msg_id, roll, pitch, yaw, alt, spd, lat, lon, mode_id)
+
+    def pack_into(self, buffer, offset: int, roll, pitch, yaw, alt, spd, lat, lon, mode_id) -> int:
+        return _codec.pack_into(buffer, offset, self.fmt, self.msg_id, roll, pitch, yaw, alt, spd, lat, lon, mode_id)
+
 class aplink_control_setpoints:
-    msg_id = 1  
-                      
-    
-    roll_sp = None             
-    
-    pitch_sp = None             
-    
-    alt_sp = None             
-    
-    spd_sp = None             
-    
-    current_waypoint = None             
-    
-    
+    __slots__ = ('roll_sp', 'pitch_sp', 'alt_sp', 'spd_sp', 'current_waypoint',)
+    msg_id = 1
+    fmt = struct.Struct("=hhhhB")
+    payload_len = fmt.size
+
+    def __init__(self):
+        self.roll_sp = None
+        self.pitch_sp = None
+        self.alt_sp = None
+        self.spd_sp = None
+        self.current_waypoint = None
+
     def unpack(self, payload: bytes):
-        unpack = struct.unpack("=hhhhB", payload)
-        offset = 0
-                    
-        
-        
-        self.roll_sp = unpack[offset]
-        offset += 1
-        
-        
-        
-        self.pitch_sp = unpack[offset]
-        offset += 1
-        
-        
-        
-        self.alt_sp = unpack[offset]
-        offset += 1
-        
-        
-        
-        self.spd_sp = unpack[offset]
-        offset += 1
-        
-        
-        
-        self.current_waypoint = unpack[offset]
-        offset += 1
-        
-        
-                    
+        self.roll_sp, self.pitch_sp, self.alt_sp, self.spd_sp, self.current_waypoint = self.fmt.unpack(payload)
         return True
-    
-    def pack(self, roll_sp, pitch_sp, alt_sp, spd_sp, current_waypoint):
-        payload = struct.pack("=hhhhB", roll_sp, pitch_sp, alt_sp, spd_sp, current_waypoint)
-        return APLink().pack(payload, self.msg_id)
-        
+
+    def pack(self, roll_sp, pitch_sp, alt_sp, spd_sp, current_waypoint) -> bytes:
+        return _codec.pack_struct(self.fmt, self.msg_id, roll_sp, pitch_sp, alt_sp, spd_sp, current_waypoint)
+
+    def pack_into(self, buffer, offset: int, roll_sp, pitch_sp, alt_sp, spd_sp, current_waypoint) -> int:
+        return _codec.pack_into(buffer, offset, self.fmt, self.msg_id, roll_sp, pitch_sp, alt_sp, spd_sp, current_waypoint)
+
 class aplink_gps_raw:
-    msg_id = 2  
-                      
-    
-    lat = None             
-    
-    lon = None             
-    
-    sats = None             
-    
-    fix = None             
-    
-    
+    __slots__ = ('lat', 'lon', 'sats', 'fix',)
+    msg_id = 2
+    fmt = struct.Struct("=iiB?")
+    payload_len = fmt.size
+
+    def __init__(self):
+        self.lat = None
+        self.lon = None
+        self.sats = None
+        self.fix = None
+
     def unpack(self, payload: bytes):
-        unpack = struct.unpack("=iiB?", payload)
-        offset = 0
-                    
-        
-        
-        self.lat = unpack[offset]
-        offset += 1
-        
-        
-        
-        self.lon = unpack[offset]
-        offset += 1
-        
-        
-        
-        self.sats = unpack[offset]
-        offset += 1
-        
-        
-        
-        self.fix = unpack[offset]
-        offset += 1
-        
-        
-                    
+        self.lat, self.lon, self.sats, self.fix = self.fmt.unpack(payload)
         return True
-    
-    def pack(self, lat, lon, sats, fix):
-        payload = struct.pack("=iiB?", lat, lon, sats, fix)
-        return APLink().pack(payload, self.msg_id)
-        
+
+    def pack(self, lat, lon, sats, fix) -> bytes:
+        return _codec.pack_struct(self.fmt, self.msg_id, lat, lon, sats, fix)
+
+    def pack_into(self, buffer, offset: int, lat, lon, sats, fix) -> int:
+        return _codec.pack_into(buffer, offset, self.fmt, self.msg_id, lat, lon, sats, fix)
+
 class aplink_power:
-    msg_id = 3  
-                      
-    
-    batt_volt = None             
-    
-    batt_curr = None             
-    
-    batt_used = None             
-    
-    ap_curr = None             
-    
-    
+    __slots__ = ('batt_volt', 'batt_curr', 'batt_used', 'ap_curr',)
+    msg_id = 3
+    fmt = struct.Struct("=HHHH")
+    payload_len = fmt.size
+
+    def __init__(self):
+        self.batt_volt = None
+        self.batt_curr = None
+        self.batt_used = None
+        self.ap_curr = None
+
     def unpack(self, payload: bytes):
-        unpack = struct.unpack("=HHHH", payload)
-        offset = 0
-                    
-        
-        
-        self.batt_volt = unpack[offset]
-        offset += 1
-        
-        
-        
-        self.batt_curr = unpack[offset]
-        offset += 1
-        
-        
-        
-        self.batt_used = unpack[offset]
-        offset += 1
-        
-        
-        
-        self.ap_curr = unpack[offset]
-        offset += 1
-        
-        
-                    
+        self.batt_volt, self.batt_curr, self.batt_used, self.ap_curr = self.fmt.unpack(payload)
         return True
-    
-    def pack(self, batt_volt, batt_curr, batt_used, ap_curr):
-        payload = struct.pack("=HHHH", batt_volt, batt_curr, batt_used, ap_curr)
-        return APLink().pack(payload, self.msg_id)
-        
+
+    def pack(self, batt_volt, batt_curr, batt_used, ap_curr) -> bytes:
+        return _codec.pack_struct(self.fmt, self.msg_id, batt_volt, batt_curr, batt_used, ap_curr)
+
+    def pack_into(self, buffer, offset: int, batt_volt, batt_curr, batt_used, ap_curr) -> int:
+        return _codec.pack_into(buffer, offset, self.fmt, self.msg_id, batt_volt, batt_curr, batt_used, ap_curr)
+
 class aplink_rc_input:
-    msg_id = 4  
-                      
-    
-    ail = None             
-    
-    ele = None             
-    
-    rud = None             
-    
-    thr = None             
-    
-    
+    __slots__ = ('ail', 'ele', 'rud', 'thr',)
+    msg_id = 4
+    fmt = struct.Struct("=bbbb")
+    payload_len = fmt.size
+
+    def __init__(self):
+        self.ail = None
+        self.ele = None
+        self.rud = None
+        self.thr = None
+
     def unpack(self, payload: bytes):
-        unpack = struct.unpack("=bbbb", payload)
-        offset = 0
-                    
-        
-        
-        self.ail = unpack[offset]
-        offset += 1
-        
-        
-        
-        self.ele = unpack[offset]
-        offset += 1
-        
-        
-        
-        self.rud = unpack[offset]
-        offset += 1
-        
-        
-        
-        self.thr = unpack[offset]
-        offset += 1
-        
-        
-                    
+        self.ail, self.ele, self.rud, self.thr = self.fmt.unpack(payload)
         return True
-    
-    def pack(self, ail, ele, rud, thr):
-        payload = struct.pack("=bbbb", ail, ele, rud, thr)
-        return APLink().pack(payload, self.msg_id)
-        
+
+    def pack(self, ail, ele, rud, thr) -> bytes:
+        return _codec.pack_struct(self.fmt, self.msg_id, ail, ele, rud, thr)
+
+    def pack_into(self, buffer, offset: int, ail, ele, rud, thr) -> int:
+        return _codec.pack_into(buffer, offset, self.fmt, self.msg_id, ail, ele, rud, thr)
+
 class aplink_cal_sensors:
-    msg_id = 5  
-                      
-    
-    gx = None             
-    
-    gy = None             
-    
-    gz = None             
-    
-    ax = None             
-    
-    ay = None             
-    
-    az = None             
-    
-    mx = None             
-    
-    my = None             
-    
-    mz = None             
-    
-    
+    __slots__ = ('gx', 'gy', 'gz', 'ax', 'ay', 'az', 'mx', 'my', 'mz',)
+    msg_id = 5
+    fmt = struct.Struct("=fffffffff")
+    payload_len = fmt.size
+
+    def __init__(self):
+        self.gx = None
+        self.gy = None
+        self.gz = None
+        self.ax = None
+        self.ay = None
+        self.az = None
+        self.mx = None
+        self.my = None
+        self.mz = None
+
     def unpack(self, payload: bytes):
-        unpack = struct.unpack("=fffffffff", payload)
-        offset = 0
-                    
-        
-        
-        self.gx = unpack[offset]
-        offset += 1
-        
-        
-        
-        self.gy = unpack[offset]
-        offset += 1
-        
-        
-        
-        self.gz = unpack[offset]
-        offset += 1
-        
-        
-        
-        self.ax = unpack[offset]
-        offset += 1
-        
-        
-        
-        self.ay = unpack[offset]
-        offset += 1
-        
-        
-        
-        self.az = unpack[offset]
-        offset += 1
-        
-        
-        
-        self.mx = unpack[offset]
-        offset += 1
-        
-        
-        
-        self.my = unpack[offset]
-        offset += 1
-        
-        
-        
-        self.mz = unpack[offset]
-        offset += 1
-        
-        
-                    
+        self.gx, self.gy, self.gz, self.ax, self.ay, self.az, self.mx, self.my, self.mz = self.fmt.unpack(payload)
         return True
-    
-    def pack(self, gx, gy, gz, ax, ay, az, mx, my, mz):
-        payload = struct.pack("=fffffffff", gx, gy, gz, ax, ay, az, mx, my, mz)
-        return APLink().pack(payload, self.msg_id)
-        
+
+    def pack(self, gx, gy, gz, ax, ay, az, mx, my, mz) -> bytes:
+        return _codec.pack_struct(self.fmt, self.msg_id, gx, gy, gz, ax, ay, az, mx, my, mz)
+
+    def pack_into(self, buffer, offset: int, gx, gy, gz, ax, ay, az, mx, my, mz) -> int:
+        return _codec.pack_into(buffer, offset, self.fmt, self.msg_id, gx, gy, gz, ax, ay, az, mx, my, mz)
+
 class aplink_mission_item:
-    msg_id = 6  
-                      
-    
-    lat = None             
-    
-    lon = None             
-    
-    
+    __slots__ = ('lat', 'lon',)
+    msg_id = 6
+    fmt = struct.Struct("=ii")
+    payload_len = fmt.size
+
+    def __init__(self):
+        self.lat = None
+        self.lon = None
+
     def unpack(self, payload: bytes):
-        unpack = struct.unpack("=ii", payload)
-        offset = 0
-                    
-        
-        
-        self.lat = unpack[offset]
-        offset += 1
-        
-        
-        
-        self.lon = unpack[offset]
-        offset += 1
-        
-        
-                    
+        self.lat, self.lon = self.fmt.unpack(payload)
         return True
-    
-    def pack(self, lat, lon):
-        payload = struct.pack("=ii", lat, lon)
-        return APLink().pack(payload, self.msg_id)
-        
+
+    def pack(self, lat, lon) -> bytes:
+        return _codec.pack_struct(self.fmt, self.msg_id, lat, lon)
+
+    def pack_into(self, buffer, offset: int, lat, lon) -> int:
+        return _codec.pack_into(buffer, offset, self.fmt, self.msg_id, lat, lon)
+
 class aplink_hitl_sensors:
-    msg_id = 7  
-                      
-    
-    imu_ax = None             
-    
-    imu_ay = None             
-    
-    imu_az = None             
-    
-    imu_gx = None             
-    
-    imu_gy = None             
-    
-    imu_gz = None             
-    
-    mag_x = None             
-    
-    mag_y = None             
-    
-    mag_z = None             
-    
-    baro_asl = None             
-    
-    gps_lat = None             
-    
-    gps_lon = None             
-    
-    of_x = None             
-    
-    of_y = None             
-    
-    
+    __slots__ = ('imu_ax', 'imu_ay', 'imu_az', 'imu_gx', 'imu_gy', 'imu_gz', 'mag_x', 'mag_y', 'mag_z', 'baro_asl', 'gps_lat', 'gps_lon', 'of_x', 'of_y',)
+    msg_id = 7
+    fmt = struct.Struct("=ffffffffffiihh")
+    payload_len = fmt.size
+
+    def __init__(self):
+        self.imu_ax = None
+        self.imu_ay = None
+        self.imu_az = None
+        self.imu_gx = None
+        self.imu_gy = None
+        self.imu_gz = None
+        self.mag_x = None
+        self.mag_y = None
+        self.mag_z = None
+        self.baro_asl = None
+        self.gps_lat = None
+        self.gps_lon = None
+        self.of_x = None
+        self.of_y = None
+
     def unpack(self, payload: bytes):
-        unpack = struct.unpack("=ffffffffffiihh", payload)
-        offset = 0
-                    
-        
-        
-        self.imu_ax = unpack[offset]
-        offset += 1
-        
-        
-        
-        self.imu_ay = unpack[offset]
-        offset += 1
-        
-        
-        
-        self.imu_az = unpack[offset]
-        offset += 1
-        
-        
-        
-        self.imu_gx = unpack[offset]
-        offset += 1
-        
-        
-        
-        self.imu_gy = unpack[offset]
-        offset += 1
-        
-        
-        
-        self.imu_gz = unpack[offset]
-        offset += 1
-        
-        
-        
-        self.mag_x = unpack[offset]
-        offset += 1
-        
-        
-        
-        self.mag_y = unpack[offset]
-        offset += 1
-        
-        
-        
-        self.mag_z = unpack[offset]
-        offset += 1
-        
-        
-        
-        self.baro_asl = unpack[offset]
-        offset += 1
-        
-        
-        
-        self.gps_lat = unpack[offset]
-        offset += 1
-        
-        
-        
-        self.gps_lon = unpack[offset]
-        offset += 1
-        
-        
-        
-        self.of_x = unpack[offset]
-        offset += 1
-        
-        
-        
-        self.of_y = unpack[offset]
-        offset += 1
-        
-        
-                    
+        self.imu_ax, self.imu_ay, self.imu_az, self.imu_gx, self.imu_gy, self.imu_gz, self.mag_x, self.mag_y, self.mag_z, self.baro_asl, self.gps_lat, self.gps_lon, self.of_x, self.of_y = self.fmt.unpack(payload)
         return True
-    
-    def pack(self, imu_ax, imu_ay, imu_az, imu_gx, imu_gy, imu_gz, mag_x, mag_y, mag_z, baro_asl, gps_lat, gps_lon, of_x, of_y):
-        payload = struct.pack("=ffffffffffiihh", imu_ax, imu_ay, imu_az, imu_gx, imu_gy, imu_gz, mag_x, mag_y, mag_z, baro_asl, gps_lat, gps_lon, of_x, of_y)
-        return APLink().pack(payload, self.msg_id)
-        
+
+    def pack(self, imu_ax, imu_ay, imu_az, imu_gx, imu_gy, imu_gz, mag_x, mag_y, mag_z, baro_asl, gps_lat, gps_lon, of_x, of_y) -> bytes:
+        return _codec.pack_struct(self.fmt, self.msg_id, imu_ax, imu_ay, imu_az, imu_gx, imu_gy, imu_gz, mag_x, mag_y, mag_z, baro_asl, gps_lat, gps_lon, of_x, of_y)
+
+    def pack_into(self, buffer, offset: int, imu_ax, imu_ay, imu_az, imu_gx, imu_gy, imu_gz, mag_x, mag_y, mag_z, baro_asl, gps_lat, gps_lon, of_x, of_y) -> int:
+        return _codec.pack_into(buffer, offset, self.fmt, self.msg_id, imu_ax, imu_ay, imu_az, imu_gx, imu_gy, imu_gz, mag_x, mag_y, mag_z, baro_asl, gps_lat, gps_lon, of_x, of_y)
+
 class aplink_hitl_commands:
-    msg_id = 8  
-                      
-    
-    rud_pwm = None             
-    
-    ele_pwm = None             
-    
-    thr_pwm = None             
-    
-    
+    __slots__ = ('rud_pwm', 'ele_pwm', 'thr_pwm',)
+    msg_id = 8
+    fmt = struct.Struct("=HHH")
+    payload_len = fmt.size
+
+    def __init__(self):
+        self.rud_pwm = None
+        self.ele_pwm = None
+        self.thr_pwm = None
+
     def unpack(self, payload: bytes):
-        unpack = struct.unpack("=HHH", payload)
-        offset = 0
-                    
-        
-        
-        self.rud_pwm = unpack[offset]
-        offset += 1
-        
-        
-        
-        self.ele_pwm = unpack[offset]
-        offset += 1
-        
-        
-        
-        self.thr_pwm = unpack[offset]
-        offset += 1
-        
-        
-                    
+        self.rud_pwm, self.ele_pwm, self.thr_pwm = self.fmt.unpack(payload)
         return True
-    
-    def pack(self, rud_pwm, ele_pwm, thr_pwm):
-        payload = struct.pack("=HHH", rud_pwm, ele_pwm, thr_pwm)
-        return APLink().pack(payload, self.msg_id)
-        
+
+    def pack(self, rud_pwm, ele_pwm, thr_pwm) -> bytes:
+        return _codec.pack_struct(self.fmt, self.msg_id, rud_pwm, ele_pwm, thr_pwm)
+
+    def pack_into(self, buffer, offset: int, rud_pwm, ele_pwm, thr_pwm) -> int:
+        return _codec.pack_into(buffer, offset, self.fmt, self.msg_id, rud_pwm, ele_pwm, thr_pwm)
+
 class aplink_set_altitude:
-    msg_id = 9  
-                      
-    
-    altitude = None             
-    
-    
+    __slots__ = ('altitude',)
+    msg_id = 9
+    fmt = struct.Struct("=f")
+    payload_len = fmt.size
+
+    def __init__(self):
+        self.altitude = None
+
     def unpack(self, payload: bytes):
-        unpack = struct.unpack("=f", payload)
-        offset = 0
-                    
-        
-        
-        self.altitude = unpack[offset]
-        offset += 1
-        
-        
-                    
+        self.altitude, = self.fmt.unpack(payload)
         return True
-    
-    def pack(self, altitude):
-        payload = struct.pack("=f", altitude)
-        return APLink().pack(payload, self.msg_id)
-        
+
+    def pack(self, altitude) -> bytes:
+        return _codec.pack_struct(self.fmt, self.msg_id, altitude)
+
+    def pack_into(self, buffer, offset: int, altitude) -> int:
+        return _codec.pack_into(buffer, offset, self.fmt, self.msg_id, altitude)
+
 class aplink_set_altitude_result:
-    msg_id = 10  
-                      
-    
-    success = None             
-    
-    
+    __slots__ = ('success',)
+    msg_id = 10
+    fmt = struct.Struct("=?")
+    payload_len = fmt.size
+
+    def __init__(self):
+        self.success = None
+
     def unpack(self, payload: bytes):
-        unpack = struct.unpack("=?", payload)
-        offset = 0
-                    
-        
-        
-        self.success = unpack[offset]
-        offset += 1
-        
-        
-                    
+        self.success, = self.fmt.unpack(payload)
         return True
-    
-    def pack(self, success):
-        payload = struct.pack("=?", success)
-        return APLink().pack(payload, self.msg_id)
-        
+
+    def pack(self, success) -> bytes:
+        return _codec.pack_struct(self.fmt, self.msg_id, success)
+
+    def pack_into(self, buffer, offset: int, success) -> int:
+        return _codec.pack_into(buffer, offset, self.fmt, self.msg_id, success)
+
 class aplink_waypoints_count:
-    msg_id = 11  
-                      
-    
-    num_waypoints = None             
-    
-    type = None             
-    
-    radius = None             
-    
-    direction = None             
-    
-    final_leg = None             
-    
-    glideslope = None             
-    
-    runway_heading = None             
-    
-    
+    __slots__ = ('num_waypoints', 'type', 'radius', 'direction', 'final_leg', 'glideslope', 'runway_heading',)
+    msg_id = 11
+    fmt = struct.Struct("=BBfBfff")
+    payload_len = fmt.size
+
+    def __init__(self):
+        self.num_waypoints = None
+        self.type = None
+        self.radius = None
+        self.direction = None
+        self.final_leg = None
+        self.glideslope = None
+        self.runway_heading = None
+
     def unpack(self, payload: bytes):
-        unpack = struct.unpack("=BBfBfff", payload)
-        offset = 0
-                    
-        
-        
-        self.num_waypoints = unpack[offset]
-        offset += 1
-        
-        
-        
-        self.type = unpack[offset]
-        offset += 1
-        
-        
-        
-        self.radius = unpack[offset]
-        offset += 1
-        
-        
-        
-        self.direction = unpack[offset]
-        offset += 1
-        
-        
-        
-        self.final_leg = unpack[offset]
-        offset += 1
-        
-        
-        
-        self.glideslope = unpack[offset]
-        offset += 1
-        
-        
-        
-        self.runway_heading = unpack[offset]
-        offset += 1
-        
-        
-                    
+        self.num_waypoints, self.type, self.radius, self.direction, self.final_leg, self.glideslope, self.runway_heading = self.fmt.unpack(payload)
         return True
-    
-    def pack(self, num_waypoints, type, radius, direction, final_leg, glideslope, runway_heading):
-        payload = struct.pack("=BBfBfff", num_waypoints, type, radius, direction, final_leg, glideslope, runway_heading)
-        return APLink().pack(payload, self.msg_id)
-        
+
+    def pack(self, num_waypoints, type, radius, direction, final_leg, glideslope, runway_heading) -> bytes:
+        return _codec.pack_struct(self.fmt, self.msg_id, num_waypoints, type, radius, direction, final_leg, glideslope, runway_heading)
+
+    def pack_into(self, buffer, offset: int, num_waypoints, type, radius, direction, final_leg, glideslope, runway_heading) -> int:
+        return _codec.pack_into(buffer, offset, self.fmt, self.msg_id, num_waypoints, type, radius, direction, final_leg, glideslope, runway_heading)
+
 class aplink_request_waypoint:
-    msg_id = 12  
-                      
-    
-    index = None             
-    
-    
+    __slots__ = ('index',)
+    msg_id = 12
+    fmt = struct.Struct("=B")
+    payload_len = fmt.size
+
+    def __init__(self):
+        self.index = None
+
     def unpack(self, payload: bytes):
-        unpack = struct.unpack("=B", payload)
-        offset = 0
-                    
-        
-        
-        self.index = unpack[offset]
-        offset += 1
-        
-        
-                    
+        self.index, = self.fmt.unpack(payload)
         return True
-    
-    def pack(self, index):
-        payload = struct.pack("=B", index)
-        return APLink().pack(payload, self.msg_id)
-        
+
+    def pack(self, index) -> bytes:
+        return _codec.pack_struct(self.fmt, self.msg_id, index)
+
+    def pack_into(self, buffer, offset: int, index) -> int:
+        return _codec.pack_into(buffer, offset, self.fmt, self.msg_id, index)
+
 class aplink_waypoints_ack:
-    msg_id = 13  
-                      
-    
-    success = None             
-    
-    
+    __slots__ = ('success',)
+    msg_id = 13
+    fmt = struct.Struct("=?")
+    payload_len = fmt.size
+
+    def __init__(self):
+        self.success = None
+
     def unpack(self, payload: bytes):
-        unpack = struct.unpack("=?", payload)
-        offset = 0
-                    
-        
-        
-        self.success = unpack[offset]
-        offset += 1
-        
-        
-                    
+        self.success, = self.fmt.unpack(payload)
         return True
-    
-    def pack(self, success):
-        payload = struct.pack("=?", success)
-        return APLink().pack(payload, self.msg_id)
-        
+
+    def pack(self, success) -> bytes:
+        return _codec.pack_struct(self.fmt, self.msg_id, success)
+
+    def pack_into(self, buffer, offset: int, success) -> int:
+        return _codec.pack_into(buffer, offset, self.fmt, self.msg_id, success)
+
 class aplink_time_since_epoch:
-    msg_id = 14  
-                      
-    
-    microseconds = None             
-    
-    
+    __slots__ = ('microseconds',)
+    msg_id = 14
+    fmt = struct.Struct("=Q")
+    payload_len = fmt.size
+
+    def __init__(self):
+        self.microseconds = None
+
     def unpack(self, payload: bytes):
-        unpack = struct.unpack("=Q", payload)
-        offset = 0
-                    
-        
-        
-        self.microseconds = unpack[offset]
-        offset += 1
-        
-        
-                    
+        self.microseconds, = self.fmt.unpack(payload)
         return True
-    
-    def pack(self, microseconds):
-        payload = struct.pack("=Q", microseconds)
-        return APLink().pack(payload, self.msg_id)
-        
+
+    def pack(self, microseconds) -> bytes:
+        return _codec.pack_struct(self.fmt, self.msg_id, microseconds)
+
+    def pack_into(self, buffer, offset: int, microseconds) -> int:
+        return _codec.pack_into(buffer, offset, self.fmt, self.msg_id, microseconds)
+
 class aplink_param_set:
-    msg_id = 15  
-                      
-    
-    name = []             
-    
-    value = []             
-    
-    type = None             
-    
-    
+    __slots__ = ('name', 'value', 'type',)
+    msg_id = 15
+    fmt = struct.Struct("=BBBBBBBBBBBBBBBBBBBBB")
+    payload_len = fmt.size
+
+    def __init__(self):
+        self.name = []
+        self.value = []
+        self.type = None
+
     def unpack(self, payload: bytes):
-        unpack = struct.unpack("=BBBBBBBBBBBBBBBBBBBBB", payload)
-        offset = 0
-                    
-        
-        
-        self.name = unpack[offset:offset+16]
-        offset += 16
-        
-        
-        
-        self.value = unpack[offset:offset+4]
-        offset += 4
-        
-        
-        
-        self.type = unpack[offset]
-        offset += 1
-        
-        
-                    
+        unpack = self.fmt.unpack(payload)
+        self.name = unpack[0:16]
+        self.value = unpack[16:20]
+        self.type = unpack[20]
         return True
-    
-    def pack(self, name, value, type):
-        payload = struct.pack("=BBBBBBBBBBBBBBBBBBBBB", *name, *value, type)
-        return APLink().pack(payload, self.msg_id)
-        
+
+    def pack(self, name, value, type) -> bytes:
+        return _codec.pack_struct(self.fmt, self.msg_id, *name, *value, type)
+
+    def pack_into(self, buffer, offset: int, name, value, type) -> int:
+        return _codec.pack_into(buffer, offset, self.fmt, self.msg_id, *name, *value, type)
+
 class aplink_request_cal_sensors:
-    msg_id = 16  
-                      
-    
-    placeholder = None             
-    
-    
+    __slots__ = ('placeholder',)
+    msg_id = 16
+    fmt = struct.Struct("=B")
+    payload_len = fmt.size
+
+    def __init__(self):
+        self.placeholder = None
+
     def unpack(self, payload: bytes):
-        unpack = struct.unpack("=B", payload)
-        offset = 0
-                    
-        
-        
-        self.placeholder = unpack[offset]
-        offset += 1
-        
-        
-                    
+        self.placeholder, = self.fmt.unpack(payload)
         return True
-    
-    def pack(self, placeholder):
-        payload = struct.pack("=B", placeholder)
-        return APLink().pack(payload, self.msg_id)
+
+    def pack(self, placeholder) -> bytes:
+        return _codec.pack_struct(self.fmt, self.msg_id, placeholder)
+
+    def pack_into(self, buffer, offset: int, placeholder) -> int:
+        return _codec.pack_into(buffer, offset, self.fmt, self.msg_id, placeholder)
+
+PAYLOAD_LENGTHS = {
+    aplink_vehicle_status_full.msg_id: aplink_vehicle_status_full.payload_len,
+    aplink_control_setpoints.msg_id: aplink_control_setpoints.payload_len,
+    aplink_gps_raw.msg_id: aplink_gps_raw.payload_len,
+    aplink_power.msg_id: aplink_power.payload_len,
+    aplink_rc_input.msg_id: aplink_rc_input.payload_len,
+    aplink_cal_sensors.msg_id: aplink_cal_sensors.payload_len,
+    aplink_mission_item.msg_id: aplink_mission_item.payload_len,
+    aplink_hitl_sensors.msg_id: aplink_hitl_sensors.payload_len,
+    aplink_hitl_commands.msg_id: aplink_hitl_commands.payload_len,
+    aplink_set_altitude.msg_id: aplink_set_altitude.payload_len,
+    aplink_set_altitude_result.msg_id: aplink_set_altitude_result.payload_len,
+    aplink_waypoints_count.msg_id: aplink_waypoints_count.payload_len,
+    aplink_request_waypoint.msg_id: aplink_request_waypoint.payload_len,
+    aplink_waypoints_ack.msg_id: aplink_waypoints_ack.payload_len,
+    aplink_time_since_epoch.msg_id: aplink_time_since_epoch.payload_len,
+    aplink_param_set.msg_id: aplink_param_set.payload_len,
+    aplink_request_cal_sensors.msg_id: aplink_request_cal_sensors.payload_len,
+}
+
+MESSAGE_TYPES = {
+    aplink_vehicle_status_full.msg_id: aplink_vehicle_status_full,
+    aplink_control_setpoints.msg_id: aplink_control_setpoints,
+    aplink_gps_raw.msg_id: aplink_gps_raw,
+    aplink_power.msg_id: aplink_power,
+    aplink_rc_input.msg_id: aplink_rc_input,
+    aplink_cal_sensors.msg_id: aplink_cal_sensors,
+    aplink_mission_item.msg_id: aplink_mission_item,
+    aplink_hitl_sensors.msg_id: aplink_hitl_sensors,
+    aplink_hitl_commands.msg_id: aplink_hitl_commands,
+    aplink_set_altitude.msg_id: aplink_set_altitude,
+    aplink_set_altitude_result.msg_id: aplink_set_altitude_result,
+    aplink_waypoints_count.msg_id: aplink_waypoints_count,
+    aplink_request_waypoint.msg_id: aplink_request_waypoint,
+    aplink_waypoints_ack.msg_id: aplink_waypoints_ack,
+    aplink_time_since_epoch.msg_id: aplink_time_since_epoch,
+    aplink_param_set.msg_id: aplink_param_set,
+    aplink_request_cal_sensors.msg_id: aplink_request_cal_sensors,
+}
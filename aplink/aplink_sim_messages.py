@@ -0,0 +1,41 @@
+
+# Messages the simulator speaks that are not in the firmware's message definitions yet.
+# aplink_hitl_frame mirrors a definition that has to be added there, with the same msg_id,
+# before the firmware can echo it. Once the generator emits it into aplink_messages.py this
+# file only needs to re-export the generated tables.
+
+import struct
+from aplink import aplink_messages
+from aplink.aplink_helpers import APLink
+
+_codec = APLink()
+
+class aplink_hitl_frame:
+    __slots__ = ('seq',)
+    msg_id = 17
+    fmt = struct.Struct("=I")
+    payload_len = fmt.size
+
+    def __init__(self):
+        self.seq = None
+
+    def unpack(self, payload: bytes):
+        self.seq, = self.fmt.unpack(payload)
+        return True
+
+    def pack(self, seq) -> bytes:
+        return _codec.pack_struct(self.fmt, self.msg_id, seq)
+
+    def pack_into(self, buffer, offset: int, seq) -> int:
+        return _codec.pack_into(buffer, offset, self.fmt, self.msg_id, seq)
+
+# The generated tables plus the messages above
+PAYLOAD_LENGTHS = {
+    **aplink_messages.PAYLOAD_LENGTHS,
+    aplink_hitl_frame.msg_id: aplink_hitl_frame.payload_len,
+}
+
+MESSAGE_TYPES = {
+    **aplink_messages.MESSAGE_TYPES,
+    aplink_hitl_frame.msg_id: aplink_hitl_frame,
+}
@@ -0,0 +1,201 @@
+from aplink.aplink_dispatch import APLinkDispatcher
+from aplink.aplink_helpers import APLink
+from aplink.aplink_messages import aplink_hitl_sensors, aplink_hitl_commands
+from aplink.aplink_sim_messages import PAYLOAD_LENGTHS, aplink_hitl_frame
+from loop_timing import Histogram, LoopTiming
+from utils import map_range
+import argparse
+import json
+import math
+import os
+import threading
+import time
+import tty
+
+class AutopilotStandIn:
+    """
+    Autopilot replacement on a pseudo-terminal for testing the HIL link without a board.
+
+    The simulator connects to port like a serial device. Every received
+    aplink_hitl_sensors frame updates a complementary filter attitude
+    estimate and a PD controller holding wings level at pitch_target.
+    Commands are replied to each sensor frame, or at a fixed rate when rate
+    is given. The number of the last aplink_hitl_frame received is echoed
+    before the commands unless echo_frames is False, which behaves like
+    firmware that does not know the message yet.
+    """
+
+    def __init__(self, rate=None, pitch_target=5.0, throttle=0.5, kp=0.02, kd=0.005, echo_frames=True):
+        """
+        :param rate: Command rate in Hz, None replies to every sensor frame
+        :param pitch_target: Pitch to hold in degrees
+        :param throttle: Constant throttle from 0 to 1
+        :param kp: Surface deflection per degree of attitude error
+        :param kd: Surface deflection per degree per second of body rate
+        :param echo_frames: Echo aplink_hitl_frame before the commands
+        """
+        self.rate = rate
+        self.pitch_target = pitch_target
+        self.throttle = throttle
+        self.kp = kp
+        self.kd = kd
+
+        self._master, self._slave = os.openpty()
+        tty.setraw(self._slave)
+        self.port = os.ttyname(self._slave)
+
+        self.aplink = APLink(PAYLOAD_LENGTHS)
+        self.dispatcher = APLinkDispatcher()
+        if echo_frames:
+            self.dispatcher.subscribe(aplink_hitl_frame, self._on_hitl_frame)
+        self.dispatcher.subscribe(aplink_hitl_sensors, self._on_hitl_sensors)
+        self._frame_msg = aplink_hitl_frame()
+        self._commands_msg = aplink_hitl_commands()
+        self._tx_buffer = bytearray(
+            self.aplink.calculate_packet_size(aplink_hitl_frame.payload_len) +
+            self.aplink.calculate_packet_size(aplink_hitl_commands.payload_len)
+        )
+        self._lock = threading.Lock()
+
+        self.roll = 0.0
+        self.pitch = 0.0
+        self._last_frame = None
+        self._rx_time = 0.0
+        self._commands = (1500, 1500, 1000)
+        self._frame_seq = None
+
+        self.frames_received = 0
+        self.commands_sent = 0
+        self.bytes_received = 0
+        self.bytes_sent = 0
+        self.latency = Histogram()
+        self._start_time = None
+        self._running = False
+
+    def start(self):
+        self._running = True
+        self._start_time = time.perf_counter()
+        threading.Thread(target=self._receive_thread, daemon=True).start()
+        if self.rate is not None:
+            threading.Thread(target=self._command_thread, daemon=True).start()
+
+    def stop(self):
+        self._running = False
+        os.close(self._master)
+        os.close(self._slave)
+
+    def _receive_thread(self):
+        while self._running:
+            try:
+                data = os.read(self._master, 4096)
+            except OSError: # Closed by stop()
+                return
+            self._rx_time = time.perf_counter()
+            self.bytes_received += len(data)
+            for payload, msg_id in self.aplink.parse_bytes(data):
+                self.dispatcher.dispatch(payload, msg_id)
+
+    def _command_thread(self):
+        period = 1.0 / self.rate
+        deadline = time.perf_counter()
+        while self._running:
+            deadline += period
+            remaining = deadline - time.perf_counter()
+            if remaining > 0:
+                time.sleep(remaining)
+            if self._last_frame is not None:
+                self._send_commands()
+
+    def _on_hitl_frame(self, msg: aplink_hitl_frame):
+        self._frame_seq = msg.seq
+
+    def _on_hitl_sensors(self, msg: aplink_hitl_sensors):
+        now = self._rx_time
+        dt = now - self._last_frame if self._last_frame is not None else 0.0
+        self._last_frame = now
+        self.frames_received += 1
+
+        # Specific force points up when level, so gravity gives roll and pitch
+        accel_roll = math.degrees(math.atan2(-msg.imu_ay, -msg.imu_az))
+        accel_pitch = math.degrees(math.atan2(msg.imu_ax, math.hypot(msg.imu_ay, msg.imu_az)))
+        self.roll = 0.98 * (self.roll + msg.imu_gx * dt) + 0.02 * accel_roll
+        self.pitch = 0.98 * (self.pitch + msg.imu_gy * dt) + 0.02 * accel_pitch
+
+        aileron = -self.kp * self.roll - self.kd * msg.imu_gx
+        elevator = -self.kp * (self.pitch_target - self.pitch) + self.kd * msg.imu_gy
+        self._commands = (
+            int(map_range(aileron, -1, 1, 1000, 2000)),
+            int(map_range(elevator, -1, 1, 1000, 2000)),
+            int(map_range(self.throttle, 0, 1, 1000, 2000)),
+        )
+
+        if self.rate is None:
+            self._send_commands()
+
+    def _send_commands(self):
+        with self._lock:
+            rud_pwm, ele_pwm, thr_pwm = self._commands
+            length = 0
+            if self._frame_seq is not None:
+                length = self._frame_msg.pack_into(self._tx_buffer, 0, self._frame_seq)
+            length += self._commands_msg.pack_into(self._tx_buffer, length, rud_pwm, ele_pwm, thr_pwm)
+            try:
+                os.write(self._master, self._tx_buffer[:length])
+            except OSError:
+                return
+            self.latency.record(time.perf_counter() - self._last_frame)
+            self.commands_sent += 1
+            self.bytes_sent += length
+
+    def stats(self):
+        """Counters and throughput since start()"""
+        elapsed = time.perf_counter() - self._start_time
+        return {
+            "seconds": elapsed,
+            "frames_received": self.frames_received,
+            "commands_sent": self.commands_sent,
+            "frames_per_second": self.frames_received / elapsed,
+            "bytes_received_per_second": self.bytes_received / elapsed,
+            "bytes_sent_per_second": self.bytes_sent / elapsed,
+            "crc_failures": self.aplink.crc_failures,
+            "resyncs": self.aplink.resyncs,
+            "sensor_to_command": self.latency.summary(),
+        }
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Stand-in autopilot on a pseudo-terminal")
+    parser.add_argument("--config", default="config.json")
+    parser.add_argument("--rate", type=float, default=None, help="Command rate in Hz, replies to every sensor frame by default")
+    parser.add_argument("--pitch", type=float, default=5.0, help="Pitch to hold in degrees")
+    parser.add_argument("--throttle", type=float, default=0.5)
+    parser.add_argument("--no-frame-echo", action="store_true", help="Do not echo aplink_hitl_frame, like firmware that does not know it")
+    parser.add_argument("--duration", type=float, help="Run the simulator headless against the stand-in for this many seconds of simulation time")
+    parser.add_argument("--clock", choices=["realtime", "fast", "lockstep"], help="Clock mode of the test run, defaults to config.json")
+    args = parser.parse_args()
+
+    standin = AutopilotStandIn(args.rate, args.pitch, args.throttle, echo_frames=not args.no_frame_echo)
+    standin.start()
+
+    if args.duration is None:
+        print("Stand-in autopilot listening on " + standin.port + ", set it as serial_port in config.json")
+        try:
+            while True:
+                time.sleep(5)
+                print(json.dumps(standin.stats()))
+        except KeyboardInterrupt:
+            pass
+    else:
+        from headless import run_scenario
+
+        with open(args.config) as config_file:
+            params = json.load(config_file)
+        params["serial_port"] = standin.port
+        scenario = {"duration": args.duration}
+        if args.clock is not None:
+            scenario["clock"] = {"mode": args.clock}
+
+        timing = LoopTiming()
+        run_scenario(params, scenario, timing=timing)
+        timing.report()
+        print(json.dumps(standin.stats(), indent=4))
+    standin.stop()
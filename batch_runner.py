@@ -0,0 +1,152 @@
+from multiprocessing import Pool
+import argparse
+import json
+import math
+import random
+import sys
+import time
+
+# Parameters that can be perturbed and their base value in a run
+PERTURBATIONS = ("lat", "lon", "wind_north", "wind_east", "gps_latency")
+
+def make_runs(params, batch):
+    """
+    Draw the perturbed parameters of every run.
+
+    Each entry of batch["perturbations"] is the standard deviation of a
+    normal distribution around the base value from config.json (wind is 0).
+    """
+    rng = random.Random(batch.get("seed", 0))
+    base = {
+        "lat": params["initial_conditions"]["lat"],
+        "lon": params["initial_conditions"]["lon"],
+        "wind_north": 0.0,
+        "wind_east": 0.0,
+        "gps_latency": params["gps_latency"],
+    }
+    stds = batch.get("perturbations", {})
+    for name in stds:
+        if name not in PERTURBATIONS:
+            raise ValueError("Unknown perturbation: " + name)
+
+    runs = []
+    for index in range(batch["runs"]):
+        run = {"index": index}
+        for name in PERTURBATIONS:
+            run[name] = base[name] + rng.gauss(0, stds[name]) if name in stds else base[name]
+        run["gps_latency"] = max(0.0, run["gps_latency"])
+        runs.append(run)
+    return runs
+
+def run_one(job):
+    """Fly one perturbed scenario as fast as possible in this process and return its summary metrics"""
+    params, scenario, run = job
+
+    # Imported here so every worker process loads JSBSim itself
+    from flight_dynamics import FlightDynamicsModel
+    from control_sources import ScriptedControls
+    from data_structures import SnapshotBuffer, SimulatedSensors, VehicleState
+    from sensor_scheduler import SensorScheduler
+    import utils
+
+    if "controls_file" in scenario:
+        controls = ScriptedControls.from_csv(scenario["controls_file"])
+    else:
+        controls = ScriptedControls.from_list(scenario["controls"])
+    vehicle_state = SnapshotBuffer(VehicleState())
+    sensor_scheduler = SensorScheduler(params["sensor_rates"], run["gps_latency"])
+
+    fdm = FlightDynamicsModel(
+        run["lat"],
+        run["lon"],
+        controls,
+        SnapshotBuffer(SimulatedSensors()),
+        vehicle_state,
+        sensor_scheduler=sensor_scheduler,
+        autostart=False,
+        model=params["model"],
+        debug_level=0
+    )
+    fdm.set_wind(run["wind_north"], run["wind_east"])
+    controls.sim_time = fdm.sim_time
+
+    start = time.perf_counter()
+    diverged = False
+    min_alt = math.inf
+    max_alt = -math.inf
+    max_bank = 0.0
+    max_gps_error = 0.0
+    while fdm.sim_time() < scenario["duration"]:
+        try:
+            fdm.step()
+        except ValueError: # NaN state cannot be converted to GPS integers
+            diverged = True
+            break
+
+        state = vehicle_state.read()
+        if not math.isfinite(state.alt):
+            diverged = True
+            break
+        min_alt = min(min_alt, state.alt)
+        max_alt = max(max_alt, state.alt)
+        max_bank = max(max_bank, abs(state.roll))
+
+        gps = sensor_scheduler.output.read()
+        if gps.gps_lat != 0:
+            max_gps_error = max(max_gps_error, utils.haversine(gps.gps_lat * 1e-7, gps.gps_lon * 1e-7, state.lat, state.lon))
+
+    state = vehicle_state.read()
+    return {
+        **run,
+        "diverged": diverged,
+        "sim_time": fdm.sim_time(),
+        "wall_time": time.perf_counter() - start,
+        "min_alt": min_alt,
+        "max_alt": max_alt,
+        "max_bank": max_bank,
+        "max_gps_error": max_gps_error,
+        "final_distance": utils.haversine(run["lat"], run["lon"], state.lat, state.lon) if not diverged else None,
+    }
+
+def run_batch(params, batch, workers=None, output=sys.stdout):
+    """Run every perturbed flight on a process pool, writing each summary as a JSON line as soon as it finishes"""
+    runs = make_runs(params, batch)
+    jobs = [(params, batch["scenario"], run) for run in runs]
+
+    start = time.perf_counter()
+    diverged = 0
+    sim_time = 0.0
+    with Pool(workers) as pool:
+        for result in pool.imap_unordered(run_one, jobs):
+            diverged += result["diverged"]
+            sim_time += result["sim_time"]
+            output.write(json.dumps(result) + "\n")
+            output.flush()
+
+    wall_time = time.perf_counter() - start
+    return {
+        "runs": len(runs),
+        "diverged": diverged,
+        "wall_time": wall_time,
+        "real_time_factor": sim_time / wall_time,
+    }
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Run many perturbed flights in parallel")
+    parser.add_argument("batch", help="Batch JSON file")
+    parser.add_argument("--config", default="config.json")
+    parser.add_argument("--workers", type=int, default=None, help="Number of processes, defaults to the CPU count")
+    parser.add_argument("--output", help="Write per-run JSON lines to this file instead of stdout")
+    args = parser.parse_args()
+
+    with open(args.config) as config_file:
+        params = json.load(config_file)
+    with open(args.batch) as batch_file:
+        batch = json.load(batch_file)
+
+    if args.output:
+        with open(args.output, "w") as output:
+            summary = run_batch(params, batch, args.workers, output)
+    else:
+        summary = run_batch(params, batch, args.workers)
+    print(json.dumps(summary), file=sys.stderr)
@@ -0,0 +1,150 @@
+import argparse
+import inspect
+import json
+import platform
+import sys
+import time
+import timeit
+
+def bench(fn, repeat=5, number=None, items=1):
+    """
+    Time a callable.
+
+    :param fn: Callable without arguments
+    :param repeat: Number of timing runs
+    :param number: Calls per run, picked so a run takes at least 0.2 s when None
+    :param items: Number of items fn processes per call, times are reported per item
+    :return: Dict with the best and median time per item in microseconds
+    """
+    timer = timeit.Timer(fn)
+    if number is None:
+        number, _ = timer.autorange()
+    runs = sorted(t / (number * items) * 1e6 for t in timer.repeat(repeat, number))
+    return {"best_us": runs[0], "median_us": runs[len(runs) // 2], "calls": number}
+
+def _example_values(msg_class):
+    """Arguments for msg_class.pack that fit its struct format"""
+    sample = {"f": 1.5, "d": 1.5, "?": True, "b": -5, "B": 200, "h": -300, "H": 1500, "i": -70000, "I": 70000, "q": -1, "Q": 123456789}
+    values = [sample[c] for c in msg_class.fmt.format.lstrip("=<>!@")]
+    params = list(inspect.signature(msg_class.pack).parameters)[1:]
+    if len(params) == len(values):
+        return values
+
+    # Array fields take a list, the struct format has one code per element
+    arrays = {"aplink_param_set": (16, 4)}
+    args = []
+    offset = 0
+    for size in arrays[msg_class.__name__]:
+        args.append(values[offset:offset + size])
+        offset += size
+    return args + values[offset:]
+
+def aplink_benchmarks():
+    from aplink.aplink_helpers import APLink
+    from aplink.aplink_messages import MESSAGE_TYPES, PAYLOAD_LENGTHS, aplink_hitl_sensors
+
+    results = {}
+    aplink = APLink(PAYLOAD_LENGTHS)
+    values = _example_values(aplink_hitl_sensors)
+    packet = aplink_hitl_sensors().pack(*values)
+    payload = packet[aplink.HEADER_LEN:-aplink.FOOTER_LEN]
+    stream = packet * 100
+
+    results["APLink.pack"] = bench(lambda: aplink.pack(payload, aplink_hitl_sensors.msg_id))
+    results["APLink.unpack"] = bench(lambda: aplink.unpack(packet))
+    results["APLink.parse_byte (per packet)"] = bench(lambda: [aplink.parse_byte(b) for b in packet])
+    results["APLink.parse_bytes (per packet)"] = bench(lambda: list(aplink.parse_bytes(stream)), items=100)
+
+    buffer = bytearray(aplink.MAX_PACKET_LEN)
+    for msg_class in MESSAGE_TYPES.values():
+        msg = msg_class()
+        values = _example_values(msg_class)
+        msg_payload = msg.pack(*values)[aplink.HEADER_LEN:-aplink.FOOTER_LEN]
+        results[msg_class.__name__ + ".pack"] = bench(lambda: msg.pack(*values))
+        results[msg_class.__name__ + ".pack_into"] = bench(lambda: msg.pack_into(buffer, 0, *values))
+        results[msg_class.__name__ + ".unpack"] = bench(lambda: msg.unpack(msg_payload))
+    return results
+
+def physics_benchmarks():
+    from flight_dynamics import FlightDynamicsModel
+    from data_structures import SnapshotBuffer, ControlInput, SimulatedSensors, VehicleState
+    from magnetic_field import MagneticField
+
+    results = {}
+    # Zero throttle keeps the aircraft parked so the model stays finite for any number of steps
+    fdm = FlightDynamicsModel(
+        43.878960,
+        -79.413383,
+        SnapshotBuffer(ControlInput()),
+        SnapshotBuffer(SimulatedSensors()),
+        SnapshotBuffer(VehicleState()),
+        autostart=False,
+        debug_level=0
+    )
+    results["FlightDynamicsModel.step"] = bench(fdm.step)
+    results["FGFDMExec.run"] = bench(fdm.fdm.run)
+    results["FlightDynamicsModel._read_outputs"] = bench(fdm._read_outputs)
+    results["FlightDynamicsModel._simulate_mag"] = bench(lambda: fdm._simulate_mag(43.87, -79.41, 0.1, 0.2, 0.3))
+    results["MagneticField.field_ned"] = bench(lambda: fdm.magnetic_field.field_ned(43.87, -79.41))
+    results["MagneticField tile build"] = bench(lambda: MagneticField(43.87, -79.41), repeat=3, number=1)
+    return results
+
+def utils_benchmarks():
+    import utils
+
+    return {
+        "utils.calculate_north_east": bench(lambda: utils.calculate_north_east(43.88, -79.40, 43.878960, -79.413383)),
+        "utils.camera_pose": bench(lambda: utils.camera_pose(43.88, -79.40, 120.0, 5.0, 2.0, 90.0, 43.878960, -79.413383)),
+        "utils.map_range": bench(lambda: utils.map_range(1500.0, 1000, 2000, -1, 1)),
+    }
+
+GROUPS = {
+    "aplink": aplink_benchmarks,
+    "physics": physics_benchmarks,
+    "utils": utils_benchmarks,
+}
+
+def compare(results, baseline, tolerance):
+    """Return the benchmarks whose best time got slower than baseline by more than tolerance"""
+    regressions = {}
+    for name, result in results.items():
+        if name in baseline:
+            ratio = result["best_us"] / baseline[name]["best_us"]
+            if ratio > 1 + tolerance:
+                regressions[name] = ratio
+    return regressions
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Benchmark the simulator hot paths")
+    parser.add_argument("--group", action="append", choices=list(GROUPS), help="Only run these groups, can be repeated")
+    parser.add_argument("--output", help="Write the results as JSON to this file")
+    parser.add_argument("--compare", metavar="BASELINE", help="Results JSON of an earlier run to compare against")
+    parser.add_argument("--tolerance", type=float, default=0.2, help="Allowed slowdown against the baseline (0.2 is 20%%)")
+    args = parser.parse_args()
+
+    results = {}
+    for group in args.group or GROUPS:
+        results.update(GROUPS[group]())
+
+    width = max(len(name) for name in results)
+    for name, result in results.items():
+        print(name.ljust(width) + "  " + format(result["best_us"], "10.3f") + " us")
+
+    report = {
+        "python": sys.version,
+        "platform": platform.platform(),
+        "time": time.time(),
+        "results": results,
+    }
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(report, f, indent=4)
+
+    if args.compare:
+        with open(args.compare) as f:
+            baseline = json.load(f)["results"]
+        regressions = compare(results, baseline, args.tolerance)
+        for name, ratio in regressions.items():
+            print("Regression: " + name + " is " + format(ratio, ".2f") + "x slower")
+        if regressions:
+            sys.exit(1)
@@ -0,0 +1,42 @@
+import bisect
+import csv
+from data_structures import *
+
+class ScriptedControls:
+    """
+    Control input that follows a schedule in simulation time.
+
+    Has the same read() interface as SnapshotBuffer so it can be handed to
+    FlightDynamicsModel in place of the live controls. Each keyframe holds
+    until the next one starts.
+    """
+
+    def __init__(self, keyframes, sim_time=None):
+        """
+        :param keyframes: List of (time, ControlInput) sorted by time
+        :param sim_time: Callable returning the current simulation time, can also be set later
+        """
+        self._times = [t for t, _ in keyframes]
+        self._controls = [control for _, control in keyframes]
+        self.sim_time = sim_time
+
+    def end_time(self):
+        return self._times[-1] if self._times else 0
+
+    def read(self):
+        i = bisect.bisect_right(self._times, self.sim_time()) - 1
+        if i < 0:
+            return ControlInput()
+        return self._controls[i]
+
+    @staticmethod
+    def from_list(items, sim_time=None):
+        """Build from dicts with "time", "elevator", "rudder" and "throttle" as found in scenario files"""
+        keyframes = [(item["time"], ControlInput(item.get("elevator", 0), item.get("rudder", 0), item.get("throttle", 0))) for item in items]
+        return ScriptedControls(sorted(keyframes, key=lambda k: k[0]), sim_time)
+
+    @staticmethod
+    def from_csv(path, sim_time=None):
+        """Build from a recorded CSV file with time, elevator, rudder and throttle columns"""
+        with open(path, newline="") as f:
+            return ScriptedControls.from_list([{key: float(value) for key, value in row.items()} for row in csv.DictReader(f)], sim_time)
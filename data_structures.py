@@ -1,12 +1,12 @@
 from dataclasses import dataclass
 
-@dataclass
+@dataclass(slots=True)
 class ControlInput:
     elevator: float = 0
     rudder: float = 0
     throttle: float = 0
 
-@dataclass 
+@dataclass(slots=True)
 class SimulatedSensors:
     ax: float = 0
     ay: float = 0
@@ -23,11 +23,33 @@ class SimulatedSensors:
     of_x: float = 0
     of_y: float = 0
 
-@dataclass
+@dataclass(slots=True)
 class VehicleState:
     roll: float = 0
     pitch: float = 0
     yaw: float = 0
     lat: float = 0
     lon: float = 0
-    alt: float = 0
\ No newline at end of file
+    alt: float = 0
+
+class SnapshotBuffer:
+    """
+    Hands the latest snapshot from one writer thread to any number of readers.
+
+    The writer publishes a new object instead of mutating the current one.
+    Swapping the reference is atomic, so readers always get one complete
+    snapshot without taking a lock. Published snapshots must not be modified.
+    """
+
+    def __init__(self, initial):
+        self._latest = (0, initial)
+
+    def publish(self, snapshot):
+        self._latest = (self._latest[0] + 1, snapshot)
+
+    def read(self):
+        return self._latest[1]
+
+    def read_seq(self):
+        """Returns (sequence number, snapshot), the sequence number increases with every publish"""
+        return self._latest
@@ -1,86 +1,179 @@
 import jsbsim
-import time
 import math
 import threading
-import geomag
-import numpy as np
-import navpy
+import time
 from data_structures import *
+from loop_timing import RateMeter
+from magnetic_field import MagneticField
+from sim_clock import PHYSICS_DT, RealTimeClock
+
+# Properties read after every step, indexed by the constants below
+OUTPUT_PROPERTIES = (
+    "position/lat-geod-deg",
+    "position/long-gc-deg",
+    "position/h-sl-ft",
+    "attitude/phi-rad",
+    "attitude/theta-rad",
+    "attitude/psi-rad",
+    "accelerations/n-pilot-x-norm",
+    "accelerations/n-pilot-y-norm",
+    "accelerations/n-pilot-z-norm",
+    "velocities/p-rad_sec",
+    "velocities/q-rad_sec",
+    "velocities/r-rad_sec",
+)
+(LAT_DEG, LON_DEG, ALT_FT, PHI_RAD, THETA_RAD, PSI_RAD,
+ ACCEL_X, ACCEL_Y, ACCEL_Z, P_RAD_SEC, Q_RAD_SEC, R_RAD_SEC) = range(len(OUTPUT_PROPERTIES))
 
 class FlightDynamicsModel:
-    def __init__(self, initial_lat, initial_lon, control_input: ControlInput, simulated_sensors: SimulatedSensors, vehicle_state: VehicleState):
+    def __init__(self, initial_lat, initial_lon, control_input: SnapshotBuffer, simulated_sensors: SnapshotBuffer, vehicle_state: SnapshotBuffer, clock=None, sensor_scheduler=None, autostart=True, model="YardStik", debug_level=1, recorder=None, timing=None, state_bus=None):
         self.control_input = control_input
         self.simulated_sensors = simulated_sensors
         self.vehicle_state = vehicle_state
+        self.sensor_scheduler = sensor_scheduler
+        self.recorder = recorder
+        self.timing = timing
+        self.state_bus = state_bus
 
         self.fdm = jsbsim.FGFDMExec("models_jsbsim", None)
-        self.fdm.load_model("YardStik")
+        self.fdm.set_debug_level(debug_level)
+        self.fdm.load_model(model)
 
         self._set_initial_conditions(initial_lat, initial_lon)
 
+        self.magnetic_field = MagneticField(initial_lat, initial_lon)
+
         self.fdm.run_ic()
-        self.fdm.set_dt(0.008)
+        self.fdm.set_dt(PHYSICS_DT)
+
+        self._resolve_properties()
+
+        self.clock = clock if clock is not None else RealTimeClock()
 
-        self.start_time = time.time()
+        if autostart:
+            self.start()
 
-        threading.Thread(target=self._update, daemon=True).start()
+    def start(self):
+        """Start stepping the model in a background thread"""
+        self.clock.start()
+        self._thread = threading.Thread(target=self.run, daemon=True)
+        self._thread.start()
+
+    def sim_time(self):
+        return self.fdm.get_sim_time()
+    
+    def set_wind(self, north, east, down=0.0):
+        """Set a steady wind in m/s, given as the direction the air moves towards"""
+        self.fdm["atmosphere/wind-north-fps"] = north / 0.3048
+        self.fdm["atmosphere/wind-east-fps"] = east / 0.3048
+        self.fdm["atmosphere/wind-down-fps"] = down / 0.3048
     
     def _set_initial_conditions(self, initial_lat, initial_lon):
         self.fdm["ic/lat-geod-deg"] = initial_lat
         self.fdm["ic/long-gc-deg"] = initial_lon
 
-    def _update(self):
-        while True:
-            self.fdm['fcs/elevator-cmd-norm'] = self.control_input.elevator
-            self.fdm['fcs/aileron-cmd-norm'] = self.control_input.rudder
-            self.fdm['fcs/throttle-cmd-norm'] = max(self.control_input.throttle, 0.00001) # For some reason there is a bug when throttle is 0
-
-            sim_time = self.fdm.get_sim_time()
-            real_time = time.time() - self.start_time
-            if real_time >= sim_time:
-                self.fdm.run()
-
-                mag = self._simulate_mag(
-                    self.fdm['position/lat-geod-deg'], 
-                    self.fdm['position/long-gc-deg'], 
-                    self.fdm['attitude/phi-rad'], 
-                    self.fdm['attitude/theta-rad'], 
-                    self.fdm['attitude/psi-rad'] - math.pi
-                )
-                    
-                self.simulated_sensors.ax = self.fdm['accelerations/n-pilot-x-norm']
-                self.simulated_sensors.ay = self.fdm['accelerations/n-pilot-y-norm']
-                self.simulated_sensors.az = self.fdm['accelerations/n-pilot-z-norm']
-                self.simulated_sensors.gx = self.fdm['velocities/p-rad_sec'] * 180 / math.pi
-                self.simulated_sensors.gy = self.fdm['velocities/q-rad_sec'] * 180 / math.pi
-                self.simulated_sensors.gz = self.fdm['velocities/r-rad_sec'] * 180 / math.pi
-                self.simulated_sensors.mx = -mag[0]
-                self.simulated_sensors.my = -mag[1]
-                self.simulated_sensors.mz = -mag[2]
-                self.simulated_sensors.baro_asl = self.fdm['position/h-sl-ft'] * 0.3048
-                self.simulated_sensors.gps_lat = int(self.fdm['position/lat-geod-deg'] * 1e7)
-                self.simulated_sensors.gps_lon = int(self.fdm['position/long-gc-deg'] * 1e7)
-                self.simulated_sensors.of_x = int(0)
-                self.simulated_sensors.of_y = int(0)
-
-                self.vehicle_state.roll = self.fdm['attitude/phi-deg']
-                self.vehicle_state.pitch = self.fdm['attitude/theta-deg']
-                self.vehicle_state.yaw = self.fdm['attitude/psi-deg']
-                self.vehicle_state.lat = self.fdm['position/lat-geod-deg']
-                self.vehicle_state.lon = self.fdm['position/long-gc-deg']
-                self.vehicle_state.alt = self.fdm['position/h-sl-ft'] * 0.3048
-            else:
-                time.sleep(0.0001)
+    def run(self, end_time=math.inf):
+        """Step the model, paced by the clock, until end_time in simulation time"""
+        if self.timing is None:
+            while self.fdm.get_sim_time() < end_time:
+                self.clock.wait_until(self.fdm.get_sim_time())
+                self.step()
+            return
+
+        step_duration = self.timing.histogram("physics.step")
+        overrun = self.timing.histogram("physics.deadline_overrun")
+        rate = RateMeter(self.timing.histogram("physics.real_time_factor", 1e-3, 1e3))
+        while self.fdm.get_sim_time() < end_time:
+            late = self.clock.wait_until(self.fdm.get_sim_time())
+            start = time.perf_counter()
+            self.step()
+            step_duration.record(time.perf_counter() - start)
+            if late is not None: # Only paced clocks have a deadline
+                overrun.record(late)
+            rate.update(self.fdm.get_sim_time())
+
+    def step(self):
+        """Advance the model by one time step and publish the new sensors and state"""
+        control = self.control_input.read()
+        self._set_elevator(control.elevator)
+        self._set_aileron(control.rudder)
+        self._set_throttle(max(control.throttle, 0.00001)) # For some reason there is a bug when throttle is 0
+
+        self.fdm.run()
+
+        out = self._read_outputs()
+        lat = out[LAT_DEG]
+        lon = out[LON_DEG]
+        alt = out[ALT_FT] * 0.3048
+
+        mag = self._simulate_mag(lat, lon, out[PHI_RAD], out[THETA_RAD], out[PSI_RAD] - math.pi)
+
+        sensors = SimulatedSensors(
+            out[ACCEL_X],
+            out[ACCEL_Y],
+            out[ACCEL_Z],
+            math.degrees(out[P_RAD_SEC]),
+            math.degrees(out[Q_RAD_SEC]),
+            math.degrees(out[R_RAD_SEC]),
+            -mag[0],
+            -mag[1],
+            -mag[2],
+            alt,
+            int(lat * 1e7),
+            int(lon * 1e7),
+            0,
+            0
+        )
+        self.simulated_sensors.publish(sensors)
+
+        if self.sensor_scheduler is not None:
+            self.sensor_scheduler.sample(self.fdm.get_sim_time(), sensors)
+
+        state = VehicleState(
+            math.degrees(out[PHI_RAD]),
+            math.degrees(out[THETA_RAD]),
+            math.degrees(out[PSI_RAD]),
+            lat,
+            lon,
+            alt
+        )
+        self.vehicle_state.publish(state)
+
+        if self.recorder is not None:
+            self.recorder.record(self.fdm.get_sim_time(), control, sensors, state)
+
+        if self.state_bus is not None:
+            self.state_bus.record(self.fdm.get_sim_time(), control, sensors, state)
+
+    def _resolve_properties(self):
+        """Look up the property nodes once so the step loop skips path resolution"""
+        pm = self.fdm.get_property_manager()
+        self._set_elevator = pm.get_node("fcs/elevator-cmd-norm").set_double_value
+        self._set_aileron = pm.get_node("fcs/aileron-cmd-norm").set_double_value
+        self._set_throttle = pm.get_node("fcs/throttle-cmd-norm").set_double_value
+        self._output_getters = tuple(enumerate(pm.get_node(name).get_double_value for name in OUTPUT_PROPERTIES))
+        self._outputs = [0.0] * len(OUTPUT_PROPERTIES)
+
+    def _read_outputs(self):
+        """Read every output property into the preallocated output list"""
+        outputs = self._outputs
+        for index, get in self._output_getters:
+            outputs[index] = get()
+        return outputs
     
     def _simulate_mag(self, lat_deg, lon_deg, phi_rad, the_rad, psi_rad):
-        gm = geomag.geomag.GeoMag()
-        mag = gm.GeoMag(lat_deg, lon_deg)
-        mag_ned = np.array( [mag.bx, mag.by, mag.bz] )
-        norm = np.linalg.norm(mag_ned)
-        mag_ned /= norm
-        N2B = navpy.angle2dcm(psi_rad, the_rad, phi_rad, input_unit='rad')
-        mag_body = N2B.dot(mag_ned)
-        norm = np.linalg.norm(mag_body)
-        mag_body /= norm
-        # print("  mag ned:", mag_ned, "body:", mag_body)
-        return mag_body
\ No newline at end of file
+        bn, be, bd = self.magnetic_field.field_ned(lat_deg, lon_deg)
+        norm = math.sqrt(bn * bn + be * be + bd * bd)
+        bn /= norm
+        be /= norm
+        bd /= norm
+
+        # NED to body rotation for the ZYX (yaw, pitch, roll) sequence
+        sphi, cphi = math.sin(phi_rad), math.cos(phi_rad)
+        sthe, cthe = math.sin(the_rad), math.cos(the_rad)
+        spsi, cpsi = math.sin(psi_rad), math.cos(psi_rad)
+        return (
+            cthe * cpsi * bn + cthe * spsi * be - sthe * bd,
+            (sphi * sthe * cpsi - cphi * spsi) * bn + (sphi * sthe * spsi + cphi * cpsi) * be + sphi * cthe * bd,
+            (cphi * sthe * cpsi + sphi * spsi) * bn + (cphi * sthe * spsi - sphi * cpsi) * be + cphi * cthe * bd
+        )
@@ -0,0 +1,177 @@
+import json
+import os
+import queue
+import struct
+import threading
+from collections.abc import Mapping
+from dataclasses import fields
+from operator import attrgetter
+import numpy as np
+from data_structures import *
+
+MAGIC = b"FWSIMREC"
+VERSION = 1
+HEADER_SIZE = 4096
+
+COLUMNS = (
+    ["time"]
+    + ["control_" + f.name for f in fields(ControlInput)]
+    + ["sensors_" + f.name for f in fields(SimulatedSensors)]
+    + ["state_" + f.name for f in fields(VehicleState)]
+)
+
+_get_control = attrgetter(*(f.name for f in fields(ControlInput)))
+_get_sensors = attrgetter(*(f.name for f in fields(SimulatedSensors)))
+_get_state = attrgetter(*(f.name for f in fields(VehicleState)))
+
+def _chunk_dtype(columns, chunk_rows):
+    return np.dtype([(name, "<f8", (chunk_rows,)) for name in columns])
+
+class FlightRecorder:
+    """
+    Records every physics step to a columnar binary file.
+
+    The file is a HEADER_SIZE byte header followed by fixed-size chunks. Each
+    chunk stores chunk_rows values of every column contiguously, so the whole
+    file opens as one np.memmap (see open_recording). The physics thread only
+    copies one row into a preallocated chunk; full chunks are converted to
+    columns and written by a background thread. close() rewrites the chunks
+    as a single chunk holding every row, so each column of a closed
+    recording is one contiguous block.
+    """
+
+    def __init__(self, path, chunk_rows=4096):
+        self.path = path
+        self.chunk_rows = chunk_rows
+        self.rows = 0
+        self._file = open(path, "wb")
+        self._write_header()
+
+        self._chunk = self._new_chunk()
+        self._row = 0
+        self._free_chunks = queue.SimpleQueue()
+        self._full_chunks = queue.Queue()
+        self._lock = threading.Lock()
+        self._closed = False
+        self._writer = threading.Thread(target=self._write_thread, daemon=True)
+        self._writer.start()
+
+    def _new_chunk(self):
+        # Row-major while filling, the writer transposes it into columns
+        return np.full((self.chunk_rows, len(COLUMNS)), np.nan)
+
+    def _write_header(self):
+        info = json.dumps({"columns": COLUMNS, "chunk_rows": self.chunk_rows, "rows": self.rows}).encode()
+        header = MAGIC + struct.pack("<II", VERSION, len(info)) + info
+        if len(header) > HEADER_SIZE:
+            raise ValueError("Recording header too large")
+        self._file.seek(0)
+        self._file.write(header.ljust(HEADER_SIZE, b"\0"))
+
+    def record(self, sim_time, control: ControlInput, sensors: SimulatedSensors, state: VehicleState):
+        """Called from the physics thread after every step"""
+        with self._lock:
+            if self._closed:
+                return
+            self._chunk[self._row] = (sim_time, *_get_control(control), *_get_sensors(sensors), *_get_state(state))
+            self._row += 1
+            self.rows += 1
+            if self._row == self.chunk_rows:
+                self._full_chunks.put(self._chunk)
+                try:
+                    self._chunk = self._free_chunks.get_nowait()
+                except queue.Empty:
+                    self._chunk = self._new_chunk()
+                self._row = 0
+
+    def _write_thread(self):
+        while True:
+            chunk = self._full_chunks.get()
+            if chunk is None:
+                return
+            self._file.write(np.ascontiguousarray(chunk.T).tobytes())
+            chunk.fill(np.nan)
+            self._free_chunks.put(chunk)
+
+    def close(self):
+        """Write the partly filled chunk and the final row count"""
+        with self._lock:
+            if self._closed:
+                return
+            self._closed = True
+            if self._row > 0:
+                self._full_chunks.put(self._chunk)
+        self._full_chunks.put(None)
+        self._writer.join()
+        chunks_written = (self.rows + self.chunk_rows - 1) // self.chunk_rows
+        if chunks_written > 1:
+            self._file.close()
+            self._compact()
+            return
+        self._write_header()
+        self._file.close()
+
+    def _compact(self):
+        """Rewrite the chunks as one chunk of self.rows rows, one column after another"""
+        dtype = _chunk_dtype(COLUMNS, self.chunk_rows)
+        chunks = np.memmap(self.path, dtype=dtype, mode="r", offset=HEADER_SIZE)
+        temp_path = self.path + ".tmp"
+        with open(temp_path, "wb") as f:
+            self._file = f
+            self.chunk_rows = self.rows
+            self._write_header()
+            for name in COLUMNS:
+                f.write(chunks[name].reshape(-1)[:self.rows].tobytes())
+        del chunks
+        os.replace(temp_path, self.path)
+
+class Recording(Mapping):
+    """Columns of a recording, read from the memory map when accessed"""
+
+    def __init__(self, chunks, columns, rows):
+        self.chunks = chunks
+        self.columns = columns
+        self.rows = rows
+
+    def __getitem__(self, name):
+        column = self.chunks[name]
+        if len(column) == 1:
+            return column[0, :self.rows] # A view of the memory map, closed recordings are one chunk
+        # Gathers the column's block from every chunk of a recording that was not closed
+        return column.reshape(-1)[:self.rows]
+
+    def __iter__(self):
+        return iter(self.columns)
+
+    def __len__(self):
+        return len(self.columns)
+
+def open_recording(path) -> Recording:
+    """
+    Open a recording as one memory map.
+
+    :param path: File written by FlightRecorder
+    :return: Mapping of column name to the values of that column
+    """
+    with open(path, "rb") as f:
+        header = f.read(HEADER_SIZE)
+        file_size = f.seek(0, os.SEEK_END)
+    if header[:len(MAGIC)] != MAGIC:
+        raise ValueError("Not a flight recording: " + path)
+    version, info_len = struct.unpack_from("<II", header, len(MAGIC))
+    if version != VERSION:
+        raise ValueError("Unsupported recording version " + str(version))
+    info = json.loads(header[len(MAGIC) + 8:len(MAGIC) + 8 + info_len])
+
+    dtype = _chunk_dtype(info["columns"], info["chunk_rows"])
+    if file_size - HEADER_SIZE < dtype.itemsize:
+        chunks = np.zeros(0, dtype=dtype)
+    else:
+        chunks = np.memmap(path, dtype=dtype, mode="r", offset=HEADER_SIZE, shape=((file_size - HEADER_SIZE) // dtype.itemsize,))
+
+    rows = info["rows"]
+    if rows == 0:
+        # Not closed cleanly, count the rows of the chunks that made it to disk
+        rows = int(np.count_nonzero(~np.isnan(chunks["time"])))
+
+    return Recording(chunks, info["columns"], rows)
@@ -0,0 +1,76 @@
+import math
+from panda3d.core import LineSegs, NodePath
+import utils
+
+# (line spacing, chunk size, chunks on each side of the camera's chunk, highest camera altitude drawn at), finest first
+GROUND_LEVELS = [
+    (10.0, 200.0, 3, 1500.0),
+    (50.0, 1000.0, 3, 8000.0),
+    (250.0, 5000.0, 3, math.inf),
+]
+
+class GroundGrid:
+    """
+    Flat line grid that follows the camera.
+
+    Every level of detail is a square of chunks around the camera with its
+    own line spacing. All chunks of a level are instances of one GeomNode
+    and each level has a fixed pool of chunk nodes that are moved when the
+    camera crosses a chunk border, so vertex count and draw calls stay the
+    same however far the aircraft flies. Chunks covered by a finer level
+    are left out and fine levels are hidden when the camera is high.
+    """
+
+    def __init__(self, parent: NodePath, levels=GROUND_LEVELS, color=(1, 1, 1, 1)):
+        """
+        :param parent: Node the grid is attached to, usually render
+        :param levels: Levels of detail like GROUND_LEVELS, finest first
+        :param color: Line color
+        """
+        self.root = parent.attachNewNode("ground")
+        self.levels = []
+        for spacing, chunk_size, radius, max_height in levels:
+            geometry = self._chunk_geometry(spacing, chunk_size, color)
+            pool = []
+            for _ in range((2 * radius + 1) ** 2):
+                chunk = self.root.attachNewNode("ground_chunk")
+                geometry.instanceTo(chunk)
+                chunk.hide()
+                pool.append(chunk)
+            self.levels.append((chunk_size, radius, max_height, pool))
+        self._key = None
+
+    @staticmethod
+    def _chunk_geometry(spacing, chunk_size, color):
+        """Lines of one chunk from its corner at the origin, the far edges are drawn by the neighbours"""
+        lines = LineSegs()
+        lines.set_color(*color)
+        for k in range(round(chunk_size / spacing)):
+            lines.move_to(k * spacing, 0, 0)
+            lines.draw_to(k * spacing, chunk_size, 0)
+            lines.move_to(0, k * spacing, 0)
+            lines.draw_to(chunk_size, k * spacing, 0)
+        return NodePath(lines.create())
+
+    def update(self, x, y, z):
+        """Place the chunks around the camera at (x, y, z), nothing is done until it enters another chunk"""
+        key = tuple(
+            (math.floor(x / chunk_size), math.floor(y / chunk_size), z <= max_height)
+            for chunk_size, _, max_height, _ in self.levels
+        )
+        if key == self._key:
+            return
+        self._key = key
+
+        inner = None
+        for chunk_size, radius, max_height, pool in self.levels:
+            chunks = []
+            if z <= max_height:
+                chunks, inner = utils.grid_chunks(x, y, chunk_size, radius, inner)
+            for index, chunk in enumerate(pool):
+                if index < len(chunks):
+                    i, j = chunks[index]
+                    chunk.setPos(i * chunk_size, j * chunk_size, 0)
+                    chunk.show()
+                else:
+                    chunk.hide()
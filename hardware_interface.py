@@ -1,62 +1,207 @@
-import serial
 from utils import *
-import threading
+import asyncio
 from aplink.aplink_messages import *
+from aplink.aplink_sim_messages import aplink_hitl_frame
+from aplink.aplink_dispatch import APLinkDispatcher
+from aplink.aplink_capture import CaptureWriter, RX, TX
 from data_structures import *
-from queue import Queue
 import time
+from sim_clock import LockstepClock
+from sensor_scheduler import SensorScheduler
+from loop_timing import LoopTiming
+from transports import Link, LinkLoop, open_transport, shared_link_loop
+
+LOCKSTEP_RESEND_TIMEOUT = 0.1 # Seconds to wait for commands before resending a sensor frame
 
 class HardwareInterface:
-    def __init__(self, control_input: ControlInput, simulated_sensors: SimulatedSensors):
+    def __init__(self, control_input: SnapshotBuffer, simulated_sensors: SnapshotBuffer, lockstep: LockstepClock = None, sensor_scheduler: SensorScheduler = None, capture: CaptureWriter = None, timing: LoopTiming = None, link_loop: LinkLoop = None):
         self.control_input = control_input
-        self.simulated_sensors = simulated_sensors
-        self.aplink = APLink()
+        self.capture = capture
+        self.timing = timing
+        self.lockstep = lockstep
+        self.sensor_scheduler = sensor_scheduler
+        # With a scheduler the held multi-rate samples are sent instead of the raw sensors
+        self.simulated_sensors = simulated_sensors if sensor_scheduler is None else sensor_scheduler.output
+        self.dispatcher = APLinkDispatcher()
+        self.dispatcher.subscribe(aplink_hitl_commands, self._on_hitl_commands)
+        self.dispatcher.subscribe(aplink_hitl_frame, self._on_hitl_frame)
+        self.link_loop = link_loop if link_loop is not None else shared_link_loop()
+        self.link = Link(self.dispatcher.dispatch, self._on_data)
+        self.aplink = self.link.aplink
+        self._sensors_msg = aplink_hitl_sensors()
+        self._tx_buffer = bytearray(self.aplink.calculate_packet_size(aplink_hitl_sensors.payload_len))
+        self._frame_msg = aplink_hitl_frame()
+        self._reply_seq = None
+        self.tags_replies = False # The autopilot echoes aplink_hitl_frame, replies are matched by number from then on
+        self.stale_replies = 0
+        self._tx_task = None
+        self._frame_ready = None
+        self._commands_received = None
+
+        self._send_interval = None
+        self._command_latency = None
+        self._round_trip = None
+        if timing is not None:
+            self._send_interval = timing.histogram("transmit.send_interval")
+            self._command_latency = timing.histogram("receive.command_latency")
+            # Only a true round trip when the autopilot answers every frame
+            self._round_trip = timing.histogram("link.round_trip")
+        self._last_send = None
+        self._rx_time = 0.0
 
     def connect(self, port: str, baud_rate: int) -> bool:
+        """
+        Open the link to the autopilot and start transmitting.
+
+        :param port: Serial port name, "udp://host:port", "udp://:port" to listen or "tcp://host:port"
+        :param baud_rate: Baud rate of a serial port
+        :return: False if the link could not be opened
+        """
         try:
-            self.serial_conn = serial.Serial(port, baud_rate)
-            threading.Thread(target=self._receive_thread, daemon=True).start()
-            threading.Thread(target=self._transmit_thread, daemon=True).start()
+            self.link_loop.run(self._open(port, baud_rate))
             return True
-        except serial.serialutil.SerialException: 
+        except OSError:
             return False
-    
-    def _transmit_thread(self):
+
+    def close(self):
+        """Stop transmitting and close the link"""
+        if self._tx_task is not None:
+            self.link_loop.run(self._close())
+
+    async def _open(self, port, baud_rate):
+        await open_transport(port, baud_rate, self.link)
+        self._frame_ready = asyncio.Event()
+        self._commands_received = asyncio.Event()
+        if self.lockstep is not None:
+            self.lockstep.add_listener(self._notify_frame)
+            self._frame_ready.set() # The physics may have finished a frame before the link was up
+            transmit = self._lockstep_transmit()
+        elif self.sensor_scheduler is not None:
+            self.sensor_scheduler.add_listener(self._notify_frame)
+            transmit = self._scheduled_transmit()
+        else:
+            transmit = self._periodic_transmit()
+        self._tx_task = asyncio.get_running_loop().create_task(transmit)
+
+    async def _close(self):
+        if self.lockstep is not None:
+            self.lockstep.remove_listener(self._notify_frame)
+        elif self.sensor_scheduler is not None:
+            self.sensor_scheduler.remove_listener(self._notify_frame)
+        self._tx_task.cancel()
+        try:
+            await self._tx_task
+        except asyncio.CancelledError:
+            pass
+        self._tx_task = None
+        self.link.close()
+
+    def _notify_frame(self):
+        # Called from the physics thread
+        self.link_loop.call(self._frame_ready.set)
+
+    def _pack_sensors(self) -> bytearray:
+        """Encode the current sensors into the reusable transmit buffer"""
+        sensors = self.simulated_sensors.read()
+        self._sensors_msg.pack_into(
+            self._tx_buffer,
+            0,
+            sensors.ax,
+            sensors.ay,
+            sensors.az,
+            sensors.gx,
+            sensors.gy,
+            sensors.gz,
+            sensors.mx,
+            sensors.my,
+            sensors.mz,
+            sensors.baro_asl,
+            sensors.gps_lat,
+            sensors.gps_lon,
+            sensors.of_x,
+            sensors.of_y
+        )
+        return self._tx_buffer
+
+    def _write(self, data):
+        if not self.link.send(data):
+            return
+        if self._send_interval is not None:
+            now = time.perf_counter()
+            if self._last_send is not None:
+                self._send_interval.record(now - self._last_send)
+            self._last_send = now
+        if self.capture is not None:
+            self.capture.write(TX, data)
+
+    async def _periodic_transmit(self):
         while True:
-            self.serial_conn.write(
-                aplink_hitl_sensors().pack(
-                    self.simulated_sensors.ax,
-                    self.simulated_sensors.ay,
-                    self.simulated_sensors.az,
-                    self.simulated_sensors.gx,
-                    self.simulated_sensors.gy,
-                    self.simulated_sensors.gz,
-                    self.simulated_sensors.mx,
-                    self.simulated_sensors.my,
-                    self.simulated_sensors.mz,
-                    self.simulated_sensors.baro_asl,
-                    self.simulated_sensors.gps_lat,
-                    self.simulated_sensors.gps_lon,
-                    self.simulated_sensors.of_x,
-                    self.simulated_sensors.of_y
-                )
-            )
-
-            time.sleep(0.005)
-    
-    def _receive_thread(self):
+            self._write(self._pack_sensors())
+            await asyncio.sleep(0.005)
+
+    async def _scheduled_transmit(self):
         while True:
-            byte = self.serial_conn.read(1)
-            # print(byte)
-            result = self.aplink.parse_byte(ord(byte))
-            if result is not None:
-                payload, msg_id = result
-                if msg_id == aplink_hitl_commands.msg_id:
-                    msg = aplink_hitl_commands()
-                    msg.unpack(payload)
-
-                    self.control_input.elevator = map_range(float(msg.ele_pwm), 1000, 2000, -1, 1)
-                    self.control_input.rudder = map_range(float(msg.rud_pwm), 1000, 2000, -1, 1)
-                    self.control_input.throttle = map_range(float(msg.thr_pwm), 1000, 2000, 0, 1)
-
-                    print(vars(self.control_input))
\ No newline at end of file
+            await self._frame_ready.wait()
+            self._frame_ready.clear()
+            self._write(self._pack_sensors())
+
+    async def _lockstep_transmit(self):
+        while True:
+            await self._frame_ready.wait()
+            self._frame_ready.clear()
+            seq = self.lockstep.take_frame()
+            if seq is None:
+                continue
+            # The autopilot echoes the frame number before its commands
+            packet = self._frame_msg.pack(seq) + self._pack_sensors()
+            self._commands_received.clear()
+            self._write(packet)
+
+            # Resend the same frame if the reply got lost on the link
+            loop = asyncio.get_running_loop()
+            def resend():
+                nonlocal timer
+                self._write(packet)
+                timer = loop.call_later(LOCKSTEP_RESEND_TIMEOUT, resend)
+            timer = loop.call_later(LOCKSTEP_RESEND_TIMEOUT, resend)
+            try:
+                await self._commands_received.wait()
+            finally:
+                timer.cancel()
+
+    def _on_data(self, data):
+        self._rx_time = time.perf_counter()
+        if self.capture is not None:
+            self.capture.write(RX, data)
+
+    def _on_hitl_frame(self, msg: aplink_hitl_frame):
+        self.tags_replies = True
+        self._reply_seq = msg.seq
+
+    def _on_hitl_commands(self, msg: aplink_hitl_commands):
+        if self.lockstep is not None:
+            if self.tags_replies:
+                seq, self._reply_seq = self._reply_seq, None
+            else:
+                # Firmware without aplink_hitl_frame, the first commands after a frame answer it
+                seq = self.lockstep.pending_seq
+            if seq is None or seq != self.lockstep.pending_seq:
+                self.stale_replies += 1 # Late answer to a resent frame, or not an answer at all
+                return
+
+        control = ControlInput(
+            elevator=map_range(float(msg.ele_pwm), 1000, 2000, -1, 1),
+            rudder=map_range(float(msg.rud_pwm), 1000, 2000, -1, 1),
+            throttle=map_range(float(msg.thr_pwm), 1000, 2000, 0, 1)
+        )
+        self.control_input.publish(control)
+        if self._command_latency is not None:
+            # From the bytes arriving to the commands reaching the physics
+            now = time.perf_counter()
+            self._command_latency.record(now - self._rx_time)
+            if self._last_send is not None:
+                self._round_trip.record(now - self._last_send)
+
+        if self.lockstep is not None:
+            self.lockstep.advance(seq)
+            self._commands_received.set()
\ No newline at end of file
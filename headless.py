@@ -0,0 +1,110 @@
+from flight_dynamics import FlightDynamicsModel
+from hardware_interface import HardwareInterface
+from control_sources import ScriptedControls
+from data_structures import *
+from sim_clock import make_clock, LockstepClock
+from sensor_scheduler import SensorScheduler
+from loop_timing import LoopTiming
+import argparse
+import json
+import time
+
+def run_scenario(params, scenario, recorder=None, capture=None, timing=None, state_bus=None):
+    """
+    Run one scenario without visuals and return the final vehicle state.
+
+    The scenario is flown with its scripted "controls" (or "controls_file",
+    a recorded CSV) when present, otherwise by the autopilot over the serial
+    link. It ends after "duration" seconds of simulation time.
+    """
+    simulated_sensors = SnapshotBuffer(SimulatedSensors())
+    vehicle_state = SnapshotBuffer(VehicleState())
+
+    clock = make_clock(scenario.get("clock", params["clock"]))
+    sensor_scheduler = SensorScheduler(params["sensor_rates"], params["gps_latency"])
+
+    hardware = None
+    if "controls" in scenario or "controls_file" in scenario:
+        if isinstance(clock, LockstepClock):
+            raise ValueError("Lockstep needs the autopilot, scripted scenarios cannot use it")
+        if "controls_file" in scenario:
+            controls = ScriptedControls.from_csv(scenario["controls_file"])
+        else:
+            controls = ScriptedControls.from_list(scenario["controls"])
+    else:
+        controls = SnapshotBuffer(ControlInput())
+        lockstep = clock if isinstance(clock, LockstepClock) else None
+        hardware = HardwareInterface(controls, simulated_sensors, lockstep, sensor_scheduler, capture, timing)
+        if not hardware.connect(params["serial_port"], params["baud_rate"]):
+            raise ConnectionError("Failed to connect to " + params["serial_port"])
+
+    fdm = FlightDynamicsModel(
+        params["initial_conditions"]["lat"], 
+        params["initial_conditions"]["lon"], 
+        controls, 
+        simulated_sensors, 
+        vehicle_state,
+        clock,
+        sensor_scheduler,
+        autostart=False,
+        model=params["model"],
+        recorder=recorder,
+        timing=timing,
+        state_bus=state_bus
+    )
+    if isinstance(controls, ScriptedControls):
+        controls.sim_time = fdm.sim_time
+
+    # Step in this thread so the run stops exactly at the end of the scenario
+    clock.start()
+    try:
+        fdm.run(scenario["duration"])
+    finally:
+        if hardware is not None:
+            hardware.close()
+
+    return vehicle_state.read()
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Run the simulator without visuals")
+    parser.add_argument("scenario", help="Scenario JSON file")
+    parser.add_argument("--config", default="config.json")
+    parser.add_argument("--record", metavar="PATH", help="Record every physics step to a flight recording")
+    parser.add_argument("--capture", metavar="PATH", help="Capture the raw serial traffic of both directions")
+    parser.add_argument("--state-bus", metavar="NAME", nargs="?", const="fwsim_bus", help="Publish the state to a shared memory state bus (see state_bus.py)")
+    parser.add_argument("--force-state-bus", action="store_true", help="Replace a state bus of the same name even if the simulator that created it still seems to run")
+    args = parser.parse_args()
+
+    with open(args.config) as config_file:
+        params = json.load(config_file)
+    with open(args.scenario) as scenario_file:
+        scenario = json.load(scenario_file)
+
+    recorder = None
+    if args.record:
+        from flight_recorder import FlightRecorder
+        recorder = FlightRecorder(args.record)
+    capture = None
+    if args.capture:
+        from aplink.aplink_capture import CaptureWriter
+        capture = CaptureWriter(args.capture)
+
+    bus = None
+    if args.state_bus:
+        from state_bus import StateBus
+        bus = StateBus(["vehicle"], args.state_bus, force=args.force_state_bus)
+
+    timing = LoopTiming()
+    start = time.time()
+    try:
+        state = run_scenario(params, scenario, recorder, capture, timing, bus.writers[0] if bus is not None else None)
+    finally:
+        if bus is not None:
+            bus.unlink()
+        if recorder is not None:
+            recorder.close()
+        if capture is not None:
+            capture.close()
+        timing.report()
+    print("Scenario finished in " + str(round(time.time() - start, 2)) + " s")
+    print(state)
@@ -0,0 +1,134 @@
+import math
+import time
+from bisect import bisect_right
+
+class Histogram:
+    """
+    Log-scale histogram for timing samples.
+
+    Buckets are spaced evenly on a log scale between lowest and highest, with
+    one underflow and one overflow bucket, so recording a value is a bisect
+    and an increment without allocating. Only one thread may record, any
+    thread may read; readers get a slightly stale but consistent enough view.
+    """
+
+    def __init__(self, lowest=1e-6, highest=10.0, per_decade=10):
+        """
+        :param lowest: Upper edge of the underflow bucket
+        :param highest: Lower edge of the overflow bucket
+        :param per_decade: Number of buckets per factor of 10
+        """
+        decades = math.log10(highest / lowest)
+        n = round(decades * per_decade)
+        self.edges = [lowest * 10 ** (i / per_decade) for i in range(n + 1)]
+        self.counts = [0] * (n + 2)
+        self.count = 0
+        self.total = 0.0
+        self.min = math.inf
+        self.max = -math.inf
+
+    def record(self, value):
+        self.counts[bisect_right(self.edges, value)] += 1
+        self.count += 1
+        self.total += value
+        if value < self.min:
+            self.min = value
+        if value > self.max:
+            self.max = value
+
+    def percentile(self, q):
+        """
+        Estimate the q-th percentile (0 to 100).
+
+        Samples are assumed to be spread evenly on the log scale within their
+        bucket, and the bucket is narrowed to the smallest and largest sample.
+        """
+        counts = list(self.counts)
+        target = sum(counts) * q / 100
+        seen = 0
+        for i, count in enumerate(counts):
+            if count and seen + count >= target:
+                low = max(self.edges[i - 1] if i > 0 else self.min, self.min)
+                high = min(self.edges[i] if i < len(self.edges) else self.max, self.max)
+                fraction = (target - seen) / count
+                if low <= 0 or high <= low:
+                    return low + fraction * (high - low)
+                return low * (high / low) ** fraction
+            seen += count
+        return math.nan
+
+    def summary(self):
+        if self.count == 0:
+            return {"count": 0}
+        return {
+            "count": self.count,
+            "mean": self.total / self.count,
+            "min": self.min,
+            "p50": self.percentile(50),
+            "p90": self.percentile(90),
+            "p99": self.percentile(99),
+            "max": self.max,
+        }
+
+class LoopTiming:
+    """
+    Named histograms of loop timings, shared by the simulator threads.
+
+    Each thread gets its own histograms from histogram() and records into
+    them, so no locking is needed on the hot path. Times are in seconds.
+    """
+
+    def __init__(self, prefix="", histograms=None):
+        self.prefix = prefix
+        self.histograms = {} if histograms is None else histograms
+
+    def scoped(self, prefix):
+        """View that puts "prefix." before the names of its histograms, e.g. one per vehicle"""
+        return LoopTiming(self.prefix + prefix + ".", self.histograms)
+
+    def histogram(self, name, lowest=1e-6, highest=10.0):
+        """Return the histogram with this name, creating it on first use"""
+        name = self.prefix + name
+        if name not in self.histograms:
+            self.histograms[name] = Histogram(lowest, highest)
+        return self.histograms[name]
+
+    def summary(self):
+        """Summary of every histogram, safe to call from any thread while the loops run"""
+        return {name: histogram.summary() for name, histogram in list(self.histograms.items())}
+
+    def report(self):
+        summary = self.summary()
+        if not summary:
+            return
+        width = max(len(name) for name in summary)
+        print("Loop timing in ms (real_time_factor rows are ratios):")
+        print("  " + "".ljust(width) + "".join(column.rjust(10) for column in ("count", "mean", "p50", "p90", "p99", "max")))
+        for name, stats in summary.items():
+            line = "  " + name.ljust(width) + str(stats["count"]).rjust(10)
+            if stats["count"]:
+                scale = 1 if name.endswith("real_time_factor") else 1000
+                for column in ("mean", "p50", "p90", "p99", "max"):
+                    line += format(stats[column] * scale, "10.3f")
+            print(line)
+
+class RateMeter:
+    """Records the real time factor of a loop once per window of wall-clock time"""
+
+    def __init__(self, histogram: Histogram, window=1.0):
+        self.histogram = histogram
+        self.window = window
+        self._wall_start = None
+        self._sim_start = 0.0
+
+    def update(self, sim_time):
+        now = time.perf_counter()
+        if self._wall_start is None:
+            self._wall_start = now
+            self._sim_start = sim_time
+            return
+        elapsed = now - self._wall_start
+        if elapsed >= self.window:
+            self.histogram.record((sim_time - self._sim_start) / elapsed)
+            self._wall_start = now
+            self._sim_start = sim_time
@@ -0,0 +1,83 @@
+import math
+from collections import OrderedDict
+import geomag
+
+class MagneticField:
+    """
+    Cached lookup of the WMM magnetic field.
+
+    The WMM coefficients are loaded once and the field is sampled on square
+    lat/lon tiles, which are then bilinearly interpolated. Tiles are kept in a
+    bounded LRU cache so flying away from the start point only costs one tile
+    evaluation per tile crossed.
+    """
+
+    def __init__(self, center_lat, center_lon, tile_size_deg=0.1, tile_points=11, max_tiles=16):
+        """
+        :param center_lat: Latitude in degrees of the tile to precompute
+        :param center_lon: Longitude in degrees of the tile to precompute
+        :param tile_size_deg: Width and height of a tile in degrees
+        :param tile_points: Number of grid points along each tile edge
+        :param max_tiles: Maximum number of tiles kept in the cache
+        """
+        self.tile_size_deg = tile_size_deg
+        self.tile_points = tile_points
+        self.max_tiles = max_tiles
+        self._step_deg = tile_size_deg / (tile_points - 1)
+        self._gm = geomag.geomag.GeoMag()
+        self._tiles = OrderedDict()
+
+        self._get_tile(self._tile_key(center_lat, center_lon))
+
+    def _tile_key(self, lat_deg, lon_deg):
+        return (math.floor(lat_deg / self.tile_size_deg), math.floor(lon_deg / self.tile_size_deg))
+
+    def _get_tile(self, key):
+        tile = self._tiles.get(key)
+        if tile is not None:
+            self._tiles.move_to_end(key)
+            return tile
+
+        lat0 = key[0] * self.tile_size_deg
+        lon0 = key[1] * self.tile_size_deg
+        tile = []
+        for i in range(self.tile_points):
+            row = []
+            for j in range(self.tile_points):
+                mag = self._gm.GeoMag(lat0 + i * self._step_deg, lon0 + j * self._step_deg)
+                row.append((mag.bx, mag.by, mag.bz))
+            tile.append(row)
+
+        self._tiles[key] = tile
+        if len(self._tiles) > self.max_tiles:
+            self._tiles.popitem(last=False)
+        return tile
+
+    def field_ned(self, lat_deg, lon_deg):
+        """
+        Interpolate the magnetic field at a position.
+
+        :param lat_deg: Latitude in degrees
+        :param lon_deg: Longitude in degrees
+        :return: Field vector (north, east, down) in nT
+        """
+        key = self._tile_key(lat_deg, lon_deg)
+        tile = self._get_tile(key)
+
+        # Fractional grid coordinates inside the tile
+        u = (lat_deg - key[0] * self.tile_size_deg) / self._step_deg
+        v = (lon_deg - key[1] * self.tile_size_deg) / self._step_deg
+        i = min(int(u), self.tile_points - 2)
+        j = min(int(v), self.tile_points - 2)
+        fu = u - i
+        fv = v - j
+
+        w00 = (1 - fu) * (1 - fv)
+        w01 = (1 - fu) * fv
+        w10 = fu * (1 - fv)
+        w11 = fu * fv
+        b00 = tile[i][j]
+        b01 = tile[i][j + 1]
+        b10 = tile[i + 1][j]
+        b11 = tile[i + 1][j + 1]
+        return tuple(w00 * b00[k] + w01 * b01[k] + w10 * b10[k] + w11 * b11[k] for k in range(3))
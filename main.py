@@ -1,40 +1,114 @@
-from flight_dynamics import FlightDynamicsModel
-from visuals import Visuals
-from hardware_interface import HardwareInterface
-from data_structures import *
+from startup_profile import StartupProfiler
+import argparse
+import atexit
 import json
+import os
+import sys
+
+def per_vehicle_path(path, name):
+    """path with the vehicle name before the extension, recordings.bin becomes recordings-alpha.bin"""
+    root, ext = os.path.splitext(path)
+    return root + "-" + name + ext
 
 if __name__ == "__main__":
-    config_file = open("config.json")
-    params = json.load(config_file)
-
-    control_inputs = ControlInput()
-    simulated_sensors = SimulatedSensors()
-    vehicle_state = VehicleState()
-    mouse_keyboard_controls = ControlInput()
-
-    hardware = HardwareInterface(control_inputs, simulated_sensors)
-    
-    if hardware.connect(params["serial_port"], params["baud_rate"]):
-        print("Serial connected" + params["serial_port"])
-        fdm_controls = control_inputs
-    else:
-        print("Serial failed to connect to " + params["serial_port"] + ", using mouse and keyboard controls instead")
-        fdm_controls = mouse_keyboard_controls
-
-    fdm = FlightDynamicsModel(
-        params["initial_conditions"]["lat"], 
-        params["initial_conditions"]["lon"], 
-        fdm_controls, 
-        simulated_sensors, 
-        vehicle_state
-    )
-
-    visuals = Visuals(
-        params["initial_conditions"]["lat"], 
-        params["initial_conditions"]["lon"], 
-        vehicle_state, 
-        mouse_keyboard_controls
-    )
-
-    visuals.run()
\ No newline at end of file
+    parser = argparse.ArgumentParser(description="Hardware-in-the-loop fixed wing simulator")
+    parser.add_argument("--profile-startup", action="store_true", help="Print how long each startup phase took")
+    parser.add_argument("--record", metavar="PATH", help="Record every physics step to a flight recording")
+    parser.add_argument("--capture", metavar="PATH", help="Capture the raw serial traffic of both directions")
+    parser.add_argument("--state-bus", metavar="NAME", nargs="?", const="fwsim_bus", help="Publish every vehicle's state to a shared memory state bus (see state_bus.py)")
+    parser.add_argument("--force-state-bus", action="store_true", help="Replace a state bus of the same name even if the simulator that created it still seems to run")
+    args = parser.parse_args()
+
+    profiler = StartupProfiler(args.profile_startup)
+
+    # Heavy modules are imported here rather than at the top so their cost shows up in the profile
+    with profiler.phase("import data_structures, sim_clock, loop_timing"):
+        from data_structures import *
+        from sim_clock import make_clock, FastClock, LockstepClock
+        from loop_timing import LoopTiming
+    with profiler.phase("import vehicles, hardware_interface, flight_dynamics"):
+        from vehicles import Vehicle, VehicleScheduler, vehicle_configs
+    from shared_state import SharedVehicleStates
+    from render_process import start_render_process
+
+    with profiler.phase("load config"):
+        config_file = open("config.json")
+        params = json.load(config_file)
+
+    configs = vehicle_configs(params)
+
+    # Vehicle states go to the render process and its mouse and keyboard controls come back
+    shared = SharedVehicleStates(len(configs))
+    atexit.register(shared.unlink)
+    mouse_keyboard_controls = shared.controls
+    multi_vehicle = len(configs) > 1
+
+    clock = make_clock(params["clock"])
+    lockstep_mode = isinstance(clock, LockstepClock)
+    if lockstep_mode:
+        # Every vehicle waits for its own autopilot, the shared clock does not pace
+        clock = FastClock()
+
+    timing = LoopTiming()
+    atexit.register(timing.report)
+
+    if args.record:
+        with profiler.phase("import flight_recorder"):
+            from flight_recorder import FlightRecorder
+    if args.capture:
+        from aplink.aplink_capture import CaptureWriter
+
+    state_bus = None
+    if args.state_bus:
+        from state_bus import StateBus
+        state_bus = StateBus([config["name"] for config in configs], args.state_bus, force=args.force_state_bus)
+        atexit.register(state_bus.unlink)
+
+    vehicles = []
+    for index, config in enumerate(configs):
+        name = config["name"]
+        capture = None
+        if args.capture:
+            capture = CaptureWriter(per_vehicle_path(args.capture, name) if multi_vehicle else args.capture)
+            atexit.register(capture.close)
+
+        lockstep = LockstepClock(params["clock"].get("steps_per_frame", 1)) if lockstep_mode else None
+        vehicle = Vehicle(config, params, lockstep, capture, timing.scoped(name) if multi_vehicle else timing, shared.states[index])
+
+        with profiler.phase("connect " + name):
+            connected = vehicle.connect()
+        controls = None
+        if connected:
+            print("Serial connected" + config["serial_port"])
+            atexit.register(vehicle.hardware.close)
+        elif lockstep_mode:
+            raise ConnectionError("Lockstep needs the autopilot, failed to connect to " + config["serial_port"])
+        else:
+            print("Serial failed to connect to " + config["serial_port"] + ", using mouse and keyboard controls instead")
+            controls = mouse_keyboard_controls
+
+        recorder = None
+        if args.record:
+            recorder = FlightRecorder(per_vehicle_path(args.record, name) if multi_vehicle else args.record)
+            atexit.register(recorder.close)
+
+        with profiler.phase("load flight dynamics model " + name):
+            vehicle.load_model(controls, recorder, state_bus=state_bus.writers[index] if state_bus is not None else None)
+        vehicles.append(vehicle)
+
+    scheduler = VehicleScheduler(vehicles, clock, timing)
+    scheduler.start()
+
+    with profiler.phase("start render process"):
+        render_process = start_render_process(shared, configs[0]["lat"], configs[0]["lon"], params.get("render", {}))
+
+    profiler.report()
+
+    # The simulation ends when the window is closed
+    render_process.join()
+    if render_process.exitcode != 0:
+        if render_process.exitcode < 0:
+            print("Render process was killed by signal " + str(-render_process.exitcode), file=sys.stderr)
+        else:
+            print("Render process failed with exit code " + str(render_process.exitcode) + ", see its traceback above", file=sys.stderr)
+        sys.exit(1)
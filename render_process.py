@@ -0,0 +1,36 @@
+from multiprocessing import get_context
+from shared_state import SharedVehicleStates
+
+def run_visuals(shm_name, count, center_lat, center_lon, render_params):
+    """Entry point of the render process, shows the vehicles published in the shared block"""
+    from visuals import Visuals
+
+    shared = SharedVehicleStates(count, shm_name)
+    try:
+        Visuals(
+            center_lat,
+            center_lon,
+            shared.states,
+            shared.controls,
+            max_fps=render_params.get("max_fps", 60),
+            interpolation_delay=render_params.get("interpolation_delay", 0.03)
+        ).run()
+    finally:
+        shared.close()
+
+def start_render_process(shared: SharedVehicleStates, center_lat, center_lon, render_params=None):
+    """
+    Start the visualiser in its own process so Panda3D frames never compete with the physics for the GIL.
+
+    render_params is the "render" section of config.json.
+
+    Spawned rather than forked, the physics and link threads are already running.
+    """
+    process = get_context("spawn").Process(
+        target=run_visuals,
+        args=(shared.name, shared.count, center_lat, center_lon, render_params or {}),
+        name="visuals",
+        daemon=True
+    )
+    process.start()
+    return process
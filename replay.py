@@ -0,0 +1,75 @@
+from aplink.aplink_capture import read_capture, RX, TX
+from aplink.aplink_dispatch import APLinkDispatcher
+from aplink.aplink_helpers import APLink
+from aplink.aplink_sim_messages import MESSAGE_TYPES, PAYLOAD_LENGTHS
+import argparse
+import json
+import time
+
+DIRECTIONS = {"rx": RX, "tx": TX}
+
+def replay(path, realtime=False, loops=1):
+    """
+    Feed a capture through APLink parsing and message decoding.
+
+    Each direction gets its own parser and dispatcher, and every message
+    type is subscribed so all payloads are decoded.
+
+    :param path: Capture file written by CaptureWriter
+    :param realtime: Keep the recorded timing instead of running as fast as possible
+    :param loops: Number of times to replay the capture
+    :return: Dict with throughput, message counts and parser error counters per direction
+    """
+    links = {}
+    for name in DIRECTIONS:
+        dispatcher = APLinkDispatcher()
+        for msg_class in MESSAGE_TYPES.values():
+            dispatcher.subscribe(msg_class, lambda msg: None)
+        links[name] = (APLink(PAYLOAD_LENGTHS), dispatcher)
+    by_direction = {direction: links[name] for name, direction in DIRECTIONS.items()}
+
+    total_bytes = 0
+    messages = 0
+    start = time.perf_counter()
+    for _ in range(loops):
+        loop_start = time.perf_counter()
+        with open(path, "rb") as f:
+            for timestamp, direction, data in read_capture(f):
+                if realtime:
+                    delay = loop_start + timestamp - time.perf_counter()
+                    if delay > 0:
+                        time.sleep(delay)
+
+                aplink, dispatcher = by_direction[direction]
+                total_bytes += len(data)
+                for payload, msg_id in aplink.parse_bytes(data):
+                    dispatcher.dispatch(payload, msg_id)
+                    messages += 1
+    elapsed = time.perf_counter() - start
+
+    return {
+        "seconds": elapsed,
+        "bytes": total_bytes,
+        "messages": messages,
+        "bytes_per_second": total_bytes / elapsed if elapsed > 0 else 0,
+        "messages_per_second": messages / elapsed if elapsed > 0 else 0,
+        "directions": {
+            name: {
+                "counts": {msg: count for msg, count in dispatcher.counts().items() if count},
+                "unknown": dispatcher.unknown,
+                "crc_failures": aplink.crc_failures,
+                "resyncs": aplink.resyncs,
+                "bytes_skipped": aplink.bytes_skipped,
+            }
+            for name, (aplink, dispatcher) in links.items()
+        },
+    }
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Replay captured APLink traffic through the parser and decoders")
+    parser.add_argument("capture", help="Capture file from --capture")
+    parser.add_argument("--realtime", action="store_true", help="Keep the recorded timing")
+    parser.add_argument("--loops", type=int, default=1, help="Replay the capture this many times")
+    args = parser.parse_args()
+
+    print(json.dumps(replay(args.capture, args.realtime, args.loops), indent=4))
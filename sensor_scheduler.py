@@ -0,0 +1,84 @@
+import warnings
+from collections import deque
+from dataclasses import astuple, fields
+from data_structures import *
+from sim_clock import PHYSICS_DT
+
+# Fields of SimulatedSensors updated together by each sensor group
+SENSOR_GROUPS = {
+    "imu": ("ax", "ay", "az", "gx", "gy", "gz"),
+    "mag": ("mx", "my", "mz"),
+    "baro": ("baro_asl",),
+    "gps": ("gps_lat", "gps_lon"),
+    "of": ("of_x", "of_y"),
+}
+
+_FIELD_INDEX = {f.name: i for i, f in enumerate(fields(SimulatedSensors))}
+_GROUP_INDICES = {group: tuple(_FIELD_INDEX[name] for name in names) for group, names in SENSOR_GROUPS.items()}
+
+class SensorScheduler:
+    """
+    Samples each sensor group at its own rate in simulation time.
+
+    The physics thread calls sample() after every step. Groups whose deadline
+    has passed copy their fields from the true sensor values and hold them
+    until the next sample, and the held values are published to output as a
+    new snapshot. GPS samples are released after gps_latency seconds.
+    Listeners are called whenever at least one group was updated, so the
+    transmitter only sends new frames.
+    """
+
+    def __init__(self, rates: dict, gps_latency=0.0, physics_dt=PHYSICS_DT):
+        """
+        :param rates: Sample rate in Hz for each group in SENSOR_GROUPS
+        :param gps_latency: Delay in seconds before a GPS sample is output
+        :param physics_dt: Physics time step in seconds, groups cannot be sampled faster than once per step
+        """
+        for group in SENSOR_GROUPS:
+            if rates[group] * physics_dt > 1.0 + 1e-9:
+                warnings.warn(
+                    group + " rate of " + str(rates[group]) + " Hz is above the physics rate of " +
+                    str(round(1.0 / physics_dt, 3)) + " Hz, it is sampled every step"
+                )
+        self.output = SnapshotBuffer(SimulatedSensors())
+        self._held = list(astuple(SimulatedSensors()))
+        self.gps_latency = gps_latency
+        self._periods = {group: 1.0 / rates[group] for group in SENSOR_GROUPS}
+        self._deadlines = {group: 0.0 for group in SENSOR_GROUPS}
+        self._gps_pending = deque()
+        self._listeners = []
+
+    def add_listener(self, callback):
+        """Call callback() from the physics thread whenever output changed"""
+        self._listeners.append(callback)
+
+    def remove_listener(self, callback):
+        self._listeners.remove(callback)
+
+    def sample(self, sim_time, sensors: SimulatedSensors):
+        held = self._held
+        changed = False
+        for group, indices in _GROUP_INDICES.items():
+            if sim_time + 1e-9 < self._deadlines[group]:
+                continue
+
+            period = self._periods[group]
+            while self._deadlines[group] <= sim_time + 1e-9:
+                self._deadlines[group] += period
+
+            if group == "gps" and self.gps_latency > 0:
+                self._gps_pending.append((sim_time + self.gps_latency, sensors.gps_lat, sensors.gps_lon))
+                continue
+
+            for i, name in zip(indices, SENSOR_GROUPS[group]):
+                held[i] = getattr(sensors, name)
+            changed = True
+
+        while self._gps_pending and self._gps_pending[0][0] <= sim_time + 1e-9:
+            _, held[_FIELD_INDEX["gps_lat"]], held[_FIELD_INDEX["gps_lon"]] = self._gps_pending.popleft()
+            changed = True
+
+        if changed:
+            self.output.publish(SimulatedSensors(*held))
+            for listener in self._listeners:
+                listener()
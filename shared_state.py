@@ -0,0 +1,164 @@
+import struct
+import zlib
+from dataclasses import fields
+from multiprocessing import shared_memory
+from operator import attrgetter
+from data_structures import *
+
+_SEQ = struct.Struct("<Q")
+_CHECKSUM = struct.Struct("<I4x")
+SLOT_HEADER_SIZE = _SEQ.size + _CHECKSUM.size # Values start 8 byte aligned
+
+def write_slot(buf, offset, values_struct: struct.Struct, values):
+    """
+    Write values into a slot guarded by a sequence counter and a checksum.
+
+    The slot is a little-endian uint64 counter, a uint32 CRC-32 of the
+    packed values and 4 bytes of padding, followed by values_struct. The
+    counter is odd while the values are being written and every write adds
+    2, so it also counts the writes. Only one process may write a slot.
+
+    Python cannot issue memory barriers, so on weakly ordered CPUs like ARM
+    a reader may see the counter and the values out of order. The checksum
+    is what catches a copy that mixes two writes there.
+    """
+    payload = values_struct.pack(*values)
+    seq = _SEQ.unpack_from(buf, offset)[0]
+    _SEQ.pack_into(buf, offset, seq + 1)
+    _CHECKSUM.pack_into(buf, offset + _SEQ.size, zlib.crc32(payload))
+    buf[offset + SLOT_HEADER_SIZE:offset + SLOT_HEADER_SIZE + len(payload)] = payload
+    _SEQ.pack_into(buf, offset, seq + 2)
+
+def init_slot(buf, offset, values_struct: struct.Struct):
+    """Zero a slot and store the checksum of its zero values, before any reader attaches"""
+    payload = bytes(values_struct.size)
+    buf[offset:offset + SLOT_HEADER_SIZE + len(payload)] = bytes(SLOT_HEADER_SIZE) + payload
+    _CHECKSUM.pack_into(buf, offset + _SEQ.size, zlib.crc32(payload))
+
+def read_slot(buf, offset, values_struct: struct.Struct, retries=100):
+    """
+    Copy the values of a slot written by write_slot without blocking the writer.
+
+    A copy is only returned if the counter was even and unchanged around it
+    and the checksum matches its values.
+
+    :return: (counter, values), or None if every attempt overlapped a write
+    """
+    start = offset + _SEQ.size
+    end = offset + SLOT_HEADER_SIZE + values_struct.size
+    for _ in range(retries):
+        seq = _SEQ.unpack_from(buf, offset)[0]
+        if seq & 1:
+            continue
+        data = bytes(buf[start:end])
+        if _SEQ.unpack_from(buf, offset)[0] != seq:
+            continue
+        if zlib.crc32(memoryview(data)[_CHECKSUM.size:]) == _CHECKSUM.unpack_from(data)[0]:
+            return seq, values_struct.unpack_from(data, _CHECKSUM.size)
+    return None
+
+def slot_seq(buf, offset):
+    """Current counter of a slot, cheap to poll for new writes"""
+    return _SEQ.unpack_from(buf, offset)[0]
+
+class SharedSlot:
+    """
+    One dataclass snapshot in shared memory, see write_slot for the layout.
+
+    Neither the writer nor the readers take a lock or wait for each other,
+    so the physics process can never be stalled by a reader.
+    """
+
+    def __init__(self, buf, offset, cls):
+        """
+        :param buf: Buffer of the shared memory block
+        :param offset: Byte offset of the slot in buf, must be a multiple of 8
+        :param cls: Dataclass stored in the slot, all fields are stored as float64
+        """
+        self._buf = buf
+        self._offset = offset
+        self._cls = cls
+        self._values = struct.Struct("<" + "d" * len(fields(cls)))
+        self._get_values = attrgetter(*(f.name for f in fields(cls)))
+        self.size = SLOT_HEADER_SIZE + self._values.size
+        self._last_seq = 0
+        self._last = cls()
+
+    def clear(self):
+        """Zero the slot with a valid checksum, only while no reader is attached"""
+        init_slot(self._buf, self._offset, self._values)
+
+    def write(self, snapshot):
+        write_slot(self._buf, self._offset, self._values, self._get_values(snapshot))
+
+    def read_seq(self):
+        """Returns (number of writes, snapshot), the last consistent snapshot if the writer kept the slot busy"""
+        if slot_seq(self._buf, self._offset) != self._last_seq:
+            result = read_slot(self._buf, self._offset, self._values)
+            if result is not None:
+                self._last_seq = result[0]
+                self._last = self._cls(*result[1])
+        return self._last_seq // 2, self._last
+
+class SharedSnapshotBuffer:
+    """SnapshotBuffer backed by a SharedSlot, so the writer and the readers can live in different processes"""
+
+    def __init__(self, slot: SharedSlot):
+        self.slot = slot
+
+    def publish(self, snapshot):
+        self.slot.write(snapshot)
+
+    def read(self):
+        return self.slot.read_seq()[1]
+
+    def read_seq(self):
+        return self.slot.read_seq()
+
+class SharedVehicleStates:
+    """
+    Shared memory block between the physics process and the render process.
+
+    It holds one ControlInput slot written by the renderer (mouse and
+    keyboard controls) followed by one VehicleState slot per vehicle written
+    by the physics.
+    """
+
+    def __init__(self, count, name=None):
+        """
+        :param count: Number of vehicles
+        :param name: Name of an existing block to attach to, a new block is created when None
+        """
+        self.count = count
+        control_size = SLOT_HEADER_SIZE + 8 * len(fields(ControlInput))
+        state_size = SLOT_HEADER_SIZE + 8 * len(fields(VehicleState))
+        size = control_size + count * state_size
+        if name is None:
+            self.shm = shared_memory.SharedMemory(create=True, size=size)
+            self._owner = True
+        else:
+            # Child processes share the creator's resource tracker, so attaching does not schedule a second removal
+            self.shm = shared_memory.SharedMemory(name=name)
+            self._owner = False
+        self.name = self.shm.name
+
+        self.controls = SharedSnapshotBuffer(SharedSlot(self.shm.buf, 0, ControlInput))
+        self.states = [
+            SharedSnapshotBuffer(SharedSlot(self.shm.buf, control_size + i * state_size, VehicleState))
+            for i in range(count)
+        ]
+        if self._owner:
+            for buffer in [self.controls, *self.states]:
+                buffer.slot.clear()
+
+    def close(self):
+        """Detach, the creating process also removes the block"""
+        self.controls = None
+        self.states = None
+        self.shm.close()
+        if self._owner:
+            self.shm.unlink()
+
+    def unlink(self):
+        """Remove the block's name while it stays mapped, for exit handlers that run before the physics thread stops"""
+        self.shm.unlink()
@@ -0,0 +1,132 @@
+import time
+import threading
+
+PHYSICS_DT = 0.008 # Seconds of simulation time per physics step
+
+class ScaledClock:
+    """Paces simulation time against wall-clock time at a fixed rate (1.0 is real time)"""
+
+    def __init__(self, rate=1.0):
+        if rate <= 0:
+            raise ValueError("Clock rate must be positive")
+        self.rate = rate
+        self.start()
+
+    def start(self):
+        self.start_time = time.perf_counter()
+
+    def wait_until(self, sim_time):
+        """Sleep until the wall-clock deadline for sim_time, returns how many seconds late it woke up"""
+        deadline = self.start_time + sim_time / self.rate
+        remaining = deadline - time.perf_counter()
+        if remaining > 0:
+            time.sleep(remaining)
+        return time.perf_counter() - deadline
+
+class RealTimeClock(ScaledClock):
+    def __init__(self):
+        super().__init__(1.0)
+
+class FastClock:
+    """Runs the simulation as fast as possible"""
+
+    def start(self):
+        pass
+
+    def wait_until(self, sim_time):
+        time.sleep(0) # Give other threads a chance at the GIL
+
+class LockstepClock:
+    """
+    Advances the simulation only when the autopilot answers a sensor frame.
+
+    The physics thread blocks every steps_per_frame steps until the sensor
+    frame for the current state has been sent and the matching commands
+    have been received, so results do not depend on wall-clock timing.
+    Frames are numbered and only a reply carrying the number of the frame
+    being waited for releases the physics, so a late answer to a resent
+    frame is never taken for the next one.
+    """
+
+    def __init__(self, steps_per_frame=1):
+        if steps_per_frame < 1:
+            raise ValueError("Lockstep needs at least one step per frame")
+        self.steps_per_frame = steps_per_frame
+        self.pending_seq = None # Number of the frame the physics waits for commands on
+        self._seq = 0
+        self._cond = threading.Condition()
+        self._steps_left = 0
+        self._frame_pending = False
+        self._listeners = []
+
+    def start(self):
+        pass
+
+    def wait_until(self, sim_time):
+        self.request_frame()
+        self.wait()
+
+    def request_frame(self):
+        """Have the sensor frame for the current state sent if the physics needs commands before the next step"""
+        with self._cond:
+            if self._steps_left == 0 and not self._frame_pending and self.pending_seq is None:
+                self._frame_pending = True
+                for listener in self._listeners:
+                    listener()
+
+    def wait(self):
+        """Block until the physics may take its next step, request_frame() must have been called first"""
+        with self._cond:
+            while self._steps_left == 0:
+                self._cond.wait()
+            self._steps_left -= 1
+
+    def add_listener(self, callback):
+        """Call callback() from the physics thread whenever a frame is ready to be sent"""
+        self._listeners.append(callback)
+
+    def remove_listener(self, callback):
+        self._listeners.remove(callback)
+
+    def take_frame(self):
+        """Claim the finished frame for sending, returns its sequence number or None if there is none"""
+        with self._cond:
+            if not self._frame_pending:
+                return None
+            self._frame_pending = False
+            self._seq = (self._seq + 1) & 0xFFFFFFFF
+            self.pending_seq = self._seq
+            return self._seq
+
+    def advance(self, seq) -> bool:
+        """
+        Release the physics for the next frame once the commands have been applied.
+
+        :param seq: Sequence number echoed by the autopilot
+        :return: False if seq is not the frame being waited for, the reply is stale
+        """
+        with self._cond:
+            if seq != self.pending_seq:
+                return False
+            self.pending_seq = None
+            self._steps_left = self.steps_per_frame
+            self._cond.notify_all()
+            return True
+
+def make_clock(config):
+    """
+    Create a clock from the "clock" section of config.json.
+
+    :param config: Dict with "mode" and the options for that mode
+    :return: A clock object
+    """
+    mode = config.get("mode", "realtime")
+    if mode == "realtime":
+        return RealTimeClock()
+    if mode == "scaled":
+        return ScaledClock(config.get("rate", 1.0))
+    if mode == "fast":
+        return FastClock()
+    if mode == "lockstep":
+        return LockstepClock(config.get("steps_per_frame", 1))
+    raise ValueError("Unknown clock mode: " + mode)
@@ -0,0 +1,28 @@
+import time
+from contextlib import contextmanager
+
+class StartupProfiler:
+    """Times the named phases of simulator startup and prints them as a table"""
+
+    def __init__(self, enabled=True):
+        self.enabled = enabled
+        self.phases = []
+        self._start = time.perf_counter()
+
+    @contextmanager
+    def phase(self, name):
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.phases.append((name, time.perf_counter() - start))
+
+    def report(self):
+        if not self.enabled:
+            return
+        total = time.perf_counter() - self._start
+        width = max(len(name) for name, _ in self.phases)
+        print("Startup profile:")
+        for name, duration in self.phases:
+            print("  " + name.ljust(width) + "  " + format(duration * 1000, "8.1f") + " ms")
+        print("  " + "total".ljust(width) + "  " + format(total * 1000, "8.1f") + " ms")
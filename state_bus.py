@@ -0,0 +1,217 @@
+import argparse
+import json
+import os
+import struct
+import sys
+import time
+from dataclasses import fields
+from multiprocessing import shared_memory
+from operator import attrgetter
+from data_structures import *
+from shared_state import SLOT_HEADER_SIZE, init_slot, read_slot, slot_seq, write_slot
+
+MAGIC = b"FWSIMBUS"
+VERSION = 2
+HEADER_SIZE = 4096
+DEFAULT_NAME = "fwsim_bus"
+
+# Slots of every vehicle in layout order
+SLOT_TYPES = {
+    "control": ControlInput,
+    "sensors": SimulatedSensors,
+    "state": VehicleState,
+}
+
+class StateBus:
+    """
+    Publishes the truth state, simulated sensors and control inputs of every
+    vehicle to a named shared memory block that other processes can sample.
+
+    Layout, all integers and floats little endian:
+
+    - HEADER_SIZE byte header: MAGIC, uint32 VERSION, uint32 length of the
+      JSON description that follows, zero padded. The description holds
+      the "pid" of the publishing simulator and lists the vehicles and for
+      each one the byte offset and field names of its "control", "sensors"
+      and "state" slots.
+    - Slots, each a uint64 sequence counter, a uint32 CRC-32 (zlib.crc32)
+      of the value bytes and 4 bytes of padding, followed by float64 values:
+      the simulation time of the step, then the fields in the listed order.
+      The counter is odd while the physics writes the slot and grows by 2
+      per write.
+
+    Readers copy the checksum and the values, then retry if the counter was
+    odd or changed, or if the CRC-32 of the copied values does not match the
+    copied checksum, so the physics never waits for them. Readers must
+    verify the checksum: on CPUs that reorder memory accesses, like ARM, the
+    counter alone does not catch a copy that mixes values of two steps.
+    StateBusReader.read() does both checks.
+    """
+
+    def __init__(self, vehicle_names, name=DEFAULT_NAME, force=False):
+        """
+        :param vehicle_names: Names of the vehicles, in scheduler order
+        :param name: Name of the shared memory block readers attach to
+        :param force: Replace an existing block of the same name even if its simulator still seems to run
+        :raises FileExistsError: When the name is taken by a running simulator or by something that is not a state bus
+        """
+        vehicles = []
+        offset = HEADER_SIZE
+        for vehicle_name in vehicle_names:
+            slots = {}
+            for slot_name, cls in SLOT_TYPES.items():
+                slot_fields = ["time"] + [f.name for f in fields(cls)]
+                slots[slot_name] = {"offset": offset, "fields": slot_fields}
+                offset += SLOT_HEADER_SIZE + 8 * len(slot_fields)
+            vehicles.append({"name": vehicle_name, "slots": slots})
+
+        info = json.dumps({"pid": os.getpid(), "vehicles": vehicles}).encode()
+        header = MAGIC + struct.pack("<II", VERSION, len(info)) + info
+        if len(header) > HEADER_SIZE:
+            raise ValueError("State bus description too large")
+
+        try:
+            self.shm = shared_memory.SharedMemory(name=name, create=True, size=offset)
+        except FileExistsError:
+            if not force:
+                _check_stale(name)
+            stale = shared_memory.SharedMemory(name=name)
+            stale.close()
+            stale.unlink()
+            self.shm = shared_memory.SharedMemory(name=name, create=True, size=offset)
+        self.shm.buf[:offset] = bytes(offset)
+        self.writers = [VehicleBusWriter(self.shm.buf, vehicle["slots"]) for vehicle in vehicles]
+        self.shm.buf[:len(header)] = header # Last, readers check it before anything else
+        self.name = name
+
+    def unlink(self):
+        """Remove the block's name, readers that are attached keep their mapping"""
+        self.shm.unlink()
+
+class VehicleBusWriter:
+    """Writes one vehicle's slots, called from the physics thread after every step like a FlightRecorder"""
+
+    def __init__(self, buf, slots):
+        self._buf = buf
+        self._slots = []
+        for slot_name, cls in SLOT_TYPES.items():
+            values = struct.Struct("<" + "d" * len(slots[slot_name]["fields"]))
+            self._slots.append((slots[slot_name]["offset"], values, attrgetter(*(f.name for f in fields(cls)))))
+            init_slot(buf, slots[slot_name]["offset"], values)
+
+    def record(self, sim_time, control: ControlInput, sensors: SimulatedSensors, state: VehicleState):
+        for (offset, values, get_values), snapshot in zip(self._slots, (control, sensors, state)):
+            write_slot(self._buf, offset, values, (sim_time, *get_values(snapshot)))
+
+class StateBusReader:
+    """
+    Samples a StateBus from another process.
+
+    Reads never block the simulator: read() returns a consistent copy of a
+    slot, array() a zero-copy NumPy view that may change while it is used.
+    """
+
+    def __init__(self, name=DEFAULT_NAME):
+        self.shm = _attach(name)
+        header = bytes(self.shm.buf[:HEADER_SIZE])
+        if header[:len(MAGIC)] != MAGIC:
+            raise ValueError("Not a state bus: " + name)
+        version, info_len = struct.unpack_from("<II", header, len(MAGIC))
+        if version != VERSION:
+            raise ValueError("Unsupported state bus version " + str(version))
+        info = json.loads(header[len(MAGIC) + 8:len(MAGIC) + 8 + info_len])
+
+        self.vehicles = [vehicle["name"] for vehicle in info["vehicles"]]
+        self._slots = {}
+        for vehicle in info["vehicles"]:
+            for slot_name, slot in vehicle["slots"].items():
+                values = struct.Struct("<" + "d" * len(slot["fields"]))
+                self._slots[vehicle["name"], slot_name] = (slot["offset"], values, slot["fields"])
+
+    def seq(self, vehicle, slot):
+        """Number of writes to a slot so far, poll it to notice new steps"""
+        offset, _, _ = self._slots[vehicle, slot]
+        return slot_seq(self.shm.buf, offset) // 2
+
+    def read(self, vehicle, slot):
+        """
+        Copy the latest values of a slot.
+
+        :param vehicle: Vehicle name from self.vehicles
+        :param slot: "control", "sensors" or "state"
+        :return: Dict of field name to value including "time", None if the simulator kept the slot busy
+        """
+        offset, values, names = self._slots[vehicle, slot]
+        result = read_slot(self.shm.buf, offset, values)
+        if result is None:
+            return None
+        return dict(zip(names, result[1]))
+
+    def array(self, vehicle, slot):
+        """Zero-copy float64 view of a slot's values (time first), neither synchronised with the writer nor checksum verified, use read() for consistent samples"""
+        import numpy as np
+
+        offset, values, _ = self._slots[vehicle, slot]
+        return np.ndarray((values.size // 8,), dtype="<f8", buffer=self.shm.buf, offset=offset + SLOT_HEADER_SIZE)
+
+    def close(self):
+        self._slots = {}
+        self.shm.close()
+
+def _check_stale(name):
+    """Raise FileExistsError unless the block called name is a state bus left behind by a simulator that is no longer running"""
+    shm = _attach(name)
+    try:
+        header = bytes(shm.buf[:HEADER_SIZE])
+    finally:
+        shm.close()
+    if header[:len(MAGIC)] != MAGIC:
+        raise FileExistsError("Shared memory " + name + " exists and is not a state bus, pick another name")
+    _, info_len = struct.unpack_from("<II", header, len(MAGIC))
+    try:
+        pid = json.loads(header[len(MAGIC) + 8:len(MAGIC) + 8 + info_len])["pid"]
+    except (ValueError, KeyError):
+        pid = None
+    if pid is None or _process_alive(pid):
+        owner = "process " + str(pid) if pid is not None else "an unknown process"
+        raise FileExistsError("State bus " + name + " is in use by " + owner + ", pick another name or force the replacement")
+
+def _process_alive(pid):
+    if os.name == "nt": # Windows removes the block with its last handle, so an existing one is always in use
+        return True
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError: # Running as another user
+        return True
+    return True
+
+def _attach(name):
+    try:
+        return shared_memory.SharedMemory(name=name, track=False)
+    except TypeError: # Before Python 3.13 the attaching process would remove the block when it exits
+        from multiprocessing import resource_tracker
+        shm = shared_memory.SharedMemory(name=name)
+        resource_tracker.unregister(shm._name, "shared_memory")
+        return shm
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Print the simulator state bus as JSON lines")
+    parser.add_argument("name", nargs="?", default=DEFAULT_NAME, help="Name given to --state-bus")
+    parser.add_argument("--rate", type=float, default=10.0, help="Samples per second")
+    parser.add_argument("--slot", action="append", choices=list(SLOT_TYPES), help="Slots to print, can be repeated, defaults to state")
+    args = parser.parse_args()
+
+    reader = StateBusReader(args.name)
+    slots = args.slot or ["state"]
+    try:
+        while True:
+            sample = {vehicle: {slot: reader.read(vehicle, slot) for slot in slots} for vehicle in reader.vehicles}
+            print(json.dumps(sample))
+            sys.stdout.flush()
+            time.sleep(1.0 / args.rate)
+    except KeyboardInterrupt:
+        pass
+    finally:
+        reader.close()
@@ -0,0 +1,62 @@
+from collections import deque
+from data_structures import *
+from sim_clock import PHYSICS_DT
+import utils
+
+class StateInterpolator:
+    """
+    Smooth playback of a vehicle state buffer for the visualiser.
+
+    The physics publishes one state per step while frames are drawn at their
+    own rate, so showing the latest state at every frame judders. Every new
+    state is kept with its sequence number, which counts physics steps, and
+    frames show the state interpolated at a render position a little behind
+    the newest one. The render position advances at the observed publish
+    rate, so scaled, fast and lockstep clocks play back smoothly too.
+    """
+
+    def __init__(self, buffer, physics_dt=PHYSICS_DT, delay=0.03, history=64):
+        """
+        :param buffer: SnapshotBuffer or SharedSnapshotBuffer of VehicleState
+        :param physics_dt: Physics time step in seconds, the initial guess of the publish period
+        :param delay: How far behind the newest state frames are drawn in seconds, should exceed a frame period
+        :param history: Number of states kept
+        """
+        self.buffer = buffer
+        self.delay = delay
+        self.rate = 1.0 / physics_dt # States published per second of wall time
+        self._history = deque(maxlen=history)
+        self._render_seq = None
+        self._last_newest = None
+
+    def sample(self, wall_dt) -> VehicleState:
+        """
+        State to draw this frame.
+
+        :param wall_dt: Wall time since the previous frame in seconds
+        """
+        seq, state = self.buffer.read_seq()
+        if self._history and seq < self._history[-1][0]: # Publisher restarted
+            self._history.clear()
+            self._render_seq = None
+        if not self._history or seq != self._history[-1][0]:
+            self._history.append((seq, state))
+
+        newest = self._history[-1][0]
+        if self._render_seq is None:
+            self._render_seq = newest - self.delay * self.rate
+        elif wall_dt > 0:
+            observed = (newest - self._last_newest) / wall_dt
+            self.rate += 0.05 * (observed - self.rate)
+            self._render_seq += wall_dt * self.rate
+            # Pull towards the target delay to absorb rate estimation errors
+            self._render_seq += 0.1 * (newest - self.delay * self.rate - self._render_seq)
+        self._last_newest = newest
+        self._render_seq = max(self._history[0][0], min(newest, self._render_seq))
+
+        for i in range(len(self._history) - 1, 0, -1):
+            seq0, s0 = self._history[i - 1]
+            if seq0 <= self._render_seq:
+                seq1, s1 = self._history[i]
+                return utils.interpolate_state(s0, s1, (self._render_seq - seq0) / (seq1 - seq0))
+        return self._history[0][1]
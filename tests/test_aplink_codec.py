@@ -0,0 +1,44 @@
+import inspect
+import struct
+from aplink.aplink_helpers import APLink
+from aplink.aplink_sim_messages import MESSAGE_TYPES, PAYLOAD_LENGTHS
+
+SAMPLES = {"f": 1.5, "d": 1.5, "?": True, "b": -5, "B": 200, "h": -300, "H": 1500, "i": -70000, "I": 70000, "q": -1, "Q": 123456789}
+ARRAYS = {"aplink_param_set": (16, 4)} # Array fields take a list, the struct has one code per element
+
+def _values(msg_class):
+    return [SAMPLES[c] for c in msg_class.fmt.format.lstrip("=<>!@")]
+
+def _arguments(msg_class):
+    values = _values(msg_class)
+    if len(inspect.signature(msg_class.pack).parameters) - 1 == len(values):
+        return values
+    args = []
+    offset = 0
+    for size in ARRAYS[msg_class.__name__]:
+        args.append(values[offset:offset + size])
+        offset += size
+    return args + values[offset:]
+
+def test_pack_matches_generic_framing():
+    aplink = APLink()
+    for msg_class in MESSAGE_TYPES.values():
+        payload = struct.pack(msg_class.fmt.format, *_values(msg_class))
+        assert msg_class().pack(*_arguments(msg_class)) == aplink.pack(payload, msg_class.msg_id), msg_class.__name__
+
+def test_pack_into_matches_pack():
+    for msg_class in MESSAGE_TYPES.values():
+        packet = msg_class().pack(*_arguments(msg_class))
+        buffer = bytearray(len(packet) + 4)
+        assert msg_class().pack_into(buffer, 4, *_arguments(msg_class)) == len(packet)
+        assert bytes(buffer[4:]) == packet
+
+def test_round_trip():
+    for msg_class in MESSAGE_TYPES.values():
+        packet = msg_class().pack(*_arguments(msg_class))
+        (payload, msg_id), = APLink(PAYLOAD_LENGTHS).parse_bytes(packet)
+        assert msg_id == msg_class.msg_id
+        msg = msg_class()
+        assert msg.unpack(payload)
+        fields = [getattr(msg, name) for name in msg_class.__slots__]
+        assert [list(f) if isinstance(f, tuple) else f for f in fields] == _arguments(msg_class), msg_class.__name__
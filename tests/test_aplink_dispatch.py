@@ -0,0 +1,31 @@
+from aplink.aplink_dispatch import APLinkDispatcher
+from aplink.aplink_helpers import APLink
+from aplink.aplink_messages import aplink_hitl_commands, aplink_set_altitude
+
+def _dispatch(dispatcher, *packets):
+    aplink = APLink()
+    for packet in packets:
+        dispatcher.dispatch(*aplink.unpack(packet))
+
+def test_subscribers_get_decoded_messages():
+    dispatcher = APLinkDispatcher()
+    received = []
+    dispatcher.subscribe(aplink_hitl_commands, lambda msg: received.append((msg.rud_pwm, msg.ele_pwm, msg.thr_pwm)))
+    _dispatch(dispatcher, aplink_hitl_commands().pack(1100, 1200, 1300), aplink_set_altitude().pack(50.0))
+    assert received == [(1100, 1200, 1300)]
+
+def test_counts_unsubscribed_and_unknown():
+    dispatcher = APLinkDispatcher()
+    _dispatch(dispatcher, aplink_set_altitude().pack(50.0), aplink_set_altitude().pack(60.0))
+    dispatcher.dispatch(b"", 250)
+    assert dispatcher.counts()["aplink_set_altitude"] == 2
+    assert dispatcher.counts()["aplink_hitl_commands"] == 0
+    assert dispatcher.unknown == 1
+
+def test_unsubscribe():
+    dispatcher = APLinkDispatcher()
+    received = []
+    dispatcher.subscribe(aplink_set_altitude, received.append)
+    dispatcher.unsubscribe(aplink_set_altitude, received.append)
+    _dispatch(dispatcher, aplink_set_altitude().pack(50.0))
+    assert received == []
@@ -0,0 +1,62 @@
+from aplink.aplink_helpers import APLink
+from aplink.aplink_messages import PAYLOAD_LENGTHS, aplink_hitl_commands, aplink_set_altitude
+
+def _packets():
+    return [
+        aplink_hitl_commands().pack(1500, 1600, 1700),
+        aplink_set_altitude().pack(120.0),
+        aplink_hitl_commands().pack(1000, 2000, 1000),
+    ]
+
+def _expected():
+    aplink = APLink()
+    return [aplink.unpack(packet) for packet in _packets()]
+
+def test_whole_stream():
+    aplink = APLink(PAYLOAD_LENGTHS)
+    assert list(aplink.parse_bytes(b"".join(_packets()))) == _expected()
+
+def test_any_chunking():
+    stream = b"".join(_packets())
+    for size in range(1, len(stream) + 1):
+        aplink = APLink(PAYLOAD_LENGTHS)
+        messages = []
+        for i in range(0, len(stream), size):
+            messages += aplink.parse_bytes(stream[i:i + size])
+        assert messages == _expected(), size
+
+def test_parse_byte_matches_parse_bytes():
+    aplink = APLink(PAYLOAD_LENGTHS)
+    messages = [aplink.parse_byte(b) for b in b"".join(_packets())]
+    assert [m for m in messages if m is not None] == _expected()
+
+def test_crc_failure_recovers_next_frame():
+    first, second, third = _packets()
+    corrupted = bytearray(first)
+    corrupted[5] ^= 0xFF
+    aplink = APLink(PAYLOAD_LENGTHS)
+    assert list(aplink.parse_bytes(bytes(corrupted) + second + third)) == _expected()[1:]
+    assert aplink.crc_failures == 1
+    assert aplink.resyncs >= 1
+
+def test_frame_hidden_behind_truncated_frame():
+    first, second, third = _packets()
+    aplink = APLink(PAYLOAD_LENGTHS)
+    # The truncated frame's length would swallow the start of the next one
+    assert list(aplink.parse_bytes(first[:-3] + second + third)) == _expected()[1:]
+    assert aplink.resyncs >= 1
+
+def test_bad_header_is_rejected_without_crc():
+    aplink = APLink(PAYLOAD_LENGTHS)
+    bogus = bytes((APLink.START_BYTE, 200, aplink_hitl_commands.msg_id))
+    assert list(aplink.parse_bytes(bogus + b"".join(_packets()))) == _expected()
+    assert aplink.crc_failures == 0
+    assert aplink.resyncs == 1
+
+def test_garbage_is_counted():
+    aplink = APLink(PAYLOAD_LENGTHS)
+    assert list(aplink.parse_bytes(b"\x00\x01\x02" + b"".join(_packets()))) == _expected()
+    assert aplink.bytes_skipped == 3
+    assert aplink.resyncs == 0
+    aplink.reset_counters()
+    assert aplink.bytes_skipped == 0
@@ -0,0 +1,56 @@
+import os
+import time
+import numpy as np
+from data_structures import *
+from flight_recorder import COLUMNS, FlightRecorder, HEADER_SIZE, open_recording
+
+def _record(recorder, rows):
+    for k in range(rows):
+        recorder.record(k * 0.008, ControlInput(throttle=k), SimulatedSensors(ax=-k), VehicleState(alt=2 * k))
+
+def test_round_trip(tmp_path):
+    path = str(tmp_path / "flight.rec")
+    recorder = FlightRecorder(path, chunk_rows=64)
+    _record(recorder, 1000)
+    recorder.close()
+
+    recording = open_recording(path)
+    assert recording.rows == 1000
+    np.testing.assert_allclose(recording["time"], np.arange(1000) * 0.008)
+    np.testing.assert_array_equal(recording["control_throttle"], np.arange(1000))
+    np.testing.assert_array_equal(recording["sensors_ax"], -np.arange(1000))
+    np.testing.assert_array_equal(recording["state_alt"], 2 * np.arange(1000))
+
+def test_columns_are_views_of_the_file(tmp_path):
+    path = str(tmp_path / "flight.rec")
+    recorder = FlightRecorder(path, chunk_rows=64)
+    _record(recorder, 1000)
+    recorder.close()
+
+    recording = open_recording(path)
+    column = recording["state_alt"]
+    assert np.shares_memory(column, recording.chunks)
+    assert column.flags["C_CONTIGUOUS"]
+
+def test_short_recording(tmp_path):
+    path = str(tmp_path / "flight.rec")
+    recorder = FlightRecorder(path, chunk_rows=64)
+    _record(recorder, 10)
+    recorder.close()
+
+    recording = open_recording(path)
+    np.testing.assert_array_equal(recording["state_alt"], 2 * np.arange(10))
+
+def test_recording_that_was_not_closed(tmp_path):
+    path = str(tmp_path / "flight.rec")
+    recorder = FlightRecorder(path, chunk_rows=64)
+    _record(recorder, 150)
+    chunk_bytes = 64 * 8 * len(COLUMNS)
+    deadline = time.monotonic() + 5
+    while os.path.getsize(path) < HEADER_SIZE + 2 * chunk_bytes and time.monotonic() < deadline:
+        time.sleep(0.01)
+
+    recording = open_recording(path)
+    assert recording.rows == 128
+    np.testing.assert_array_equal(recording["state_alt"], 2 * np.arange(128))
+    recorder.close()
@@ -0,0 +1,88 @@
+import socket
+import threading
+import time
+from aplink.aplink_helpers import APLink
+from aplink.aplink_messages import aplink_hitl_commands
+from aplink.aplink_sim_messages import PAYLOAD_LENGTHS, aplink_hitl_frame
+from data_structures import *
+from hardware_interface import HardwareInterface
+from utils import map_range
+from sim_clock import LockstepClock
+
+def test_frames_are_numbered():
+    clock = LockstepClock()
+    assert clock.take_frame() is None
+
+    physics = threading.Thread(target=clock.wait_until, args=(0.0,))
+    physics.start()
+    while (seq := clock.take_frame()) is None:
+        time.sleep(0.001)
+
+    assert not clock.advance(seq + 1)
+    assert physics.is_alive()
+    assert clock.advance(seq)
+    physics.join(1)
+    assert not physics.is_alive()
+    assert not clock.advance(seq) # A duplicate reply releases nothing
+
+def test_stale_replies_are_dropped():
+    autopilot = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+    autopilot.bind(("127.0.0.1", 0))
+    autopilot.settimeout(2)
+
+    clock = LockstepClock()
+    controls = SnapshotBuffer(ControlInput())
+    hardware = HardwareInterface(controls, SnapshotBuffer(SimulatedSensors()), clock)
+    assert hardware.connect("udp://127.0.0.1:" + str(autopilot.getsockname()[1]), 0)
+    physics = threading.Thread(target=clock.wait_until, args=(0.0,))
+    physics.start()
+
+    try:
+        data, address = autopilot.recvfrom(1024)
+        packets = list(APLink(PAYLOAD_LENGTHS).parse_bytes(data))
+        assert packets[0][1] == aplink_hitl_frame.msg_id
+        frame = aplink_hitl_frame()
+        frame.unpack(packets[0][0])
+
+        commands = aplink_hitl_commands().pack(1500, 2000, 1000)
+        autopilot.sendto(aplink_hitl_frame().pack(frame.seq - 1) + commands, address) # Answer to an earlier frame
+        autopilot.sendto(commands, address) # Untagged
+        time.sleep(0.05)
+        assert physics.is_alive()
+        assert controls.read() == ControlInput()
+
+        autopilot.sendto(aplink_hitl_frame().pack(frame.seq) + commands, address)
+        physics.join(1)
+        assert not physics.is_alive()
+        assert controls.read().elevator == 1.0
+        assert hardware.stale_replies == 2
+    finally:
+        hardware.close()
+        autopilot.close()
+
+def test_untagged_replies_from_older_firmware():
+    autopilot = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+    autopilot.bind(("127.0.0.1", 0))
+    autopilot.settimeout(2)
+
+    clock = LockstepClock()
+    controls = SnapshotBuffer(ControlInput())
+    hardware = HardwareInterface(controls, SnapshotBuffer(SimulatedSensors()), clock)
+    assert hardware.connect("udp://127.0.0.1:" + str(autopilot.getsockname()[1]), 0)
+
+    try:
+        for elevator_pwm in (2000, 1000):
+            physics = threading.Thread(target=clock.wait_until, args=(0.0,))
+            physics.start()
+            _, address = autopilot.recvfrom(1024)
+            commands = aplink_hitl_commands().pack(1500, elevator_pwm, 1000)
+            autopilot.sendto(commands + commands, address) # The second one answers nothing
+            physics.join(1)
+            assert not physics.is_alive()
+            time.sleep(0.05)
+            assert controls.read().elevator == map_range(elevator_pwm, 1000, 2000, -1, 1)
+        assert not hardware.tags_replies
+        assert hardware.stale_replies == 2
+    finally:
+        hardware.close()
+        autopilot.close()
@@ -0,0 +1,36 @@
+import math
+import random
+import pytest
+from loop_timing import Histogram, LoopTiming
+
+def test_steady_samples_report_their_value():
+    histogram = Histogram()
+    for _ in range(1000):
+        histogram.record(0.008)
+    summary = histogram.summary()
+    assert summary["p50"] == pytest.approx(0.008)
+    assert summary["p99"] == pytest.approx(0.008)
+
+def test_percentiles_within_a_few_percent():
+    rng = random.Random(1)
+    samples = sorted(rng.uniform(0.001, 0.02) for _ in range(20000))
+    histogram = Histogram()
+    for sample in samples:
+        histogram.record(sample)
+    for q in (10, 50, 90, 99):
+        assert histogram.percentile(q) == pytest.approx(samples[int(len(samples) * q / 100)], rel=0.03)
+
+def test_percentiles_stay_within_samples():
+    histogram = Histogram()
+    for sample in (0.0012, 0.0013, 20.0):
+        histogram.record(sample)
+    assert 0.0012 <= histogram.percentile(1) <= histogram.percentile(50) <= histogram.percentile(100) == 20.0
+
+def test_empty():
+    assert Histogram().summary() == {"count": 0}
+    assert math.isnan(Histogram().percentile(50))
+
+def test_scoped_names():
+    timing = LoopTiming()
+    timing.scoped("alpha").histogram("link.round_trip").record(0.001)
+    assert timing.summary()["alpha.link.round_trip"]["count"] == 1
@@ -0,0 +1,37 @@
+import pytest
+from data_structures import *
+from sensor_scheduler import SensorScheduler
+
+RATES = {"imu": 100, "mag": 100, "baro": 50, "gps": 10, "of": 50}
+
+def _run(scheduler, seconds, dt=0.008):
+    frames = []
+    scheduler.add_listener(lambda: frames.append(scheduler.output.read()))
+    for k in range(1, round(seconds / dt) + 1):
+        t = k * dt
+        scheduler.sample(t, SimulatedSensors(ax=t, baro_asl=t, gps_lat=k, gps_lon=k))
+    return frames
+
+def test_frames_thin_out_below_physics_rate():
+    frames = _run(SensorScheduler(RATES), 10.0)
+    assert 1000 <= len(frames) < 1250
+
+def test_group_rates():
+    frames = _run(SensorScheduler(RATES), 10.0)
+    imu_updates = len({frame.ax for frame in frames})
+    baro_updates = len({frame.baro_asl for frame in frames})
+    assert imu_updates == pytest.approx(1000, abs=2)
+    assert baro_updates == pytest.approx(500, abs=2)
+
+def test_gps_latency():
+    scheduler = SensorScheduler(RATES, gps_latency=0.1)
+    scheduler.sample(0.0, SimulatedSensors(gps_lat=5))
+    assert scheduler.output.read().gps_lat == 0
+    scheduler.sample(0.096, SimulatedSensors(gps_lat=6))
+    assert scheduler.output.read().gps_lat == 0
+    scheduler.sample(0.104, SimulatedSensors(gps_lat=7))
+    assert scheduler.output.read().gps_lat == 5
+
+def test_rate_above_physics_rate_warns():
+    with pytest.warns(UserWarning, match="imu"):
+        SensorScheduler(dict(RATES, imu=500))
@@ -0,0 +1,42 @@
+import struct
+from data_structures import *
+from shared_state import SLOT_HEADER_SIZE, SharedVehicleStates, init_slot, read_slot, write_slot
+
+VALUES = struct.Struct("<4d")
+
+def test_round_trip():
+    buf = bytearray(SLOT_HEADER_SIZE + VALUES.size)
+    init_slot(buf, 0, VALUES)
+    assert read_slot(buf, 0, VALUES) == (0, (0.0,) * 4)
+    write_slot(buf, 0, VALUES, (1.0, 2.0, 3.0, 4.0))
+    write_slot(buf, 0, VALUES, (5.0, 6.0, 7.0, 8.0))
+    assert read_slot(buf, 0, VALUES) == (4, (5.0, 6.0, 7.0, 8.0))
+
+def test_mixed_writes_are_rejected():
+    buf = bytearray(SLOT_HEADER_SIZE + VALUES.size)
+    write_slot(buf, 0, VALUES, (1.0, 2.0, 3.0, 4.0))
+    first = bytes(buf[SLOT_HEADER_SIZE:])
+    write_slot(buf, 0, VALUES, (5.0, 6.0, 7.0, 8.0))
+    # What a reader on a weakly ordered CPU may see: an even, unchanged counter over half of each write
+    buf[SLOT_HEADER_SIZE:SLOT_HEADER_SIZE + 16] = first[:16]
+    assert read_slot(buf, 0, VALUES, retries=3) is None
+
+def test_write_in_progress_is_rejected():
+    buf = bytearray(SLOT_HEADER_SIZE + VALUES.size)
+    write_slot(buf, 0, VALUES, (1.0, 2.0, 3.0, 4.0))
+    buf[0] += 1
+    assert read_slot(buf, 0, VALUES, retries=3) is None
+
+def test_shared_vehicle_states():
+    shared = SharedVehicleStates(2)
+    attached = SharedVehicleStates(2, shared.name)
+    try:
+        assert attached.states[1].read_seq() == (0, VehicleState())
+        shared.states[1].publish(VehicleState(roll=1.0, alt=100.0))
+        attached.controls.publish(ControlInput(throttle=0.5))
+        assert attached.states[1].read_seq() == (1, VehicleState(roll=1.0, alt=100.0))
+        assert attached.states[0].read() == VehicleState()
+        assert shared.controls.read() == ControlInput(throttle=0.5)
+    finally:
+        attached.close()
+        shared.close()
@@ -0,0 +1,83 @@
+import json
+import os
+import subprocess
+import sys
+import pytest
+import struct
+from data_structures import *
+from state_bus import HEADER_SIZE, MAGIC, StateBus, StateBusReader
+
+NAME = "fwsim_test_" + str(os.getpid())
+
+def _other_simulator(crash=False):
+    """Process that creates the state bus, then exits without removing it if crash, else holds it until its stdin closes"""
+    script = "\n".join([
+        "import sys",
+        "from multiprocessing import resource_tracker",
+        "from state_bus import StateBus",
+        "from data_structures import *",
+        "bus = StateBus(['other'], " + repr(NAME) + ")",
+        "bus.writers[0].record(1.5, ControlInput(throttle=0.5), SimulatedSensors(), VehicleState(roll=2.0))",
+        "resource_tracker.unregister(bus.shm._name, 'shared_memory')" if crash else "print('ready', flush=True); sys.stdin.read()",
+    ])
+    process = subprocess.Popen([sys.executable, "-c", script], stdin=subprocess.PIPE, stdout=subprocess.PIPE, stderr=subprocess.DEVNULL, text=True)
+    if crash:
+        process.wait()
+    else:
+        assert process.stdout.readline() == "ready\n"
+    return process
+
+def _header(bus):
+    header = bytes(bus.shm.buf[:HEADER_SIZE])
+    assert header[:len(MAGIC)] == MAGIC
+    info_len = int.from_bytes(header[len(MAGIC) + 4:len(MAGIC) + 8], "little")
+    return json.loads(header[len(MAGIC) + 8:len(MAGIC) + 8 + info_len])
+
+def test_running_owner_is_not_replaced():
+    other = _other_simulator()
+    try:
+        with pytest.raises(FileExistsError, match="process " + str(other.pid)):
+            StateBus(["vehicle"], NAME)
+    finally:
+        other.stdin.close()
+        other.wait()
+
+def test_force_replaces():
+    other = _other_simulator()
+    try:
+        bus = StateBus(["alpha", "bravo"], NAME, force=True)
+        header = _header(bus)
+        assert header["pid"] == os.getpid()
+        assert [vehicle["name"] for vehicle in header["vehicles"]] == ["alpha", "bravo"]
+        bus.unlink()
+    finally:
+        other.stdin.close()
+        other.wait()
+
+def test_stale_bus_is_replaced():
+    _other_simulator(crash=True)
+    bus = StateBus(["alpha"], NAME)
+    assert [vehicle["name"] for vehicle in _header(bus)["vehicles"]] == ["alpha"]
+    bus.unlink()
+
+def test_reader_verifies_the_checksum():
+    other = _other_simulator()
+    try:
+        reader = StateBusReader(NAME)
+        state = reader.read("other", "state")
+        assert (state["time"], state["roll"]) == (1.5, 2.0)
+        assert reader.read("other", "control")["throttle"] == 0.5
+        assert reader.seq("other", "state") == 1
+
+        # A copy that mixes two steps has an even, unchanged counter but the wrong checksum
+        offset = reader._slots["other", "state"][0]
+        reader.shm.buf[offset + 24:offset + 32] = struct.pack("<d", 3.0)
+        assert reader.read("other", "state") is None
+
+        reader.shm.buf[len(MAGIC):len(MAGIC) + 4] = struct.pack("<I", 1)
+        with pytest.raises(ValueError, match="version 1"):
+            StateBusReader(NAME)
+        reader.close()
+    finally:
+        other.stdin.close()
+        other.wait()
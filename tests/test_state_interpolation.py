@@ -0,0 +1,52 @@
+import statistics
+import pytest
+from data_structures import *
+from state_interpolation import StateInterpolator
+
+PHYSICS_DT = 0.008
+FRAME_DT = 1 / 60
+
+def _play(interpolator, buffer, frames, physics_dt=PHYSICS_DT, start_step=0):
+    """Publish one state per physics step, lat counting the steps, and sample at the frame rate"""
+    samples = []
+    step = start_step
+    for frame in range(1, frames + 1):
+        while (step - start_step + 1) * physics_dt <= frame * FRAME_DT:
+            step += 1
+            buffer.publish(VehicleState(lat=step, yaw=step % 360))
+        samples.append(interpolator.sample(FRAME_DT))
+    return samples, step
+
+def test_motion_is_smooth():
+    buffer = SnapshotBuffer(VehicleState())
+    samples, _ = _play(StateInterpolator(buffer), buffer, 300)
+    moves = [b.lat - a.lat for a, b in zip(samples[100:], samples[101:])]
+    # Snapping to the newest state would move two or three steps per frame
+    assert statistics.mean(moves) == pytest.approx(FRAME_DT / PHYSICS_DT, rel=0.02)
+    assert statistics.pstdev(moves) < 0.05
+
+def test_drawn_behind_the_newest_state():
+    buffer = SnapshotBuffer(VehicleState())
+    interpolator = StateInterpolator(buffer, delay=0.03)
+    samples, newest = _play(interpolator, buffer, 300)
+    assert newest - samples[-1].lat == pytest.approx(0.03 / PHYSICS_DT, abs=1.5)
+
+def test_follows_the_publish_rate():
+    buffer = SnapshotBuffer(VehicleState())
+    samples, _ = _play(StateInterpolator(buffer), buffer, 600, physics_dt=PHYSICS_DT / 4) # Fast clock
+    moves = [b.lat - a.lat for a, b in zip(samples[500:], samples[501:])]
+    assert statistics.mean(moves) == pytest.approx(4 * FRAME_DT / PHYSICS_DT, rel=0.02)
+
+def test_attitude_is_interpolated():
+    buffer = SnapshotBuffer(VehicleState())
+    samples, _ = _play(StateInterpolator(buffer), buffer, 200)
+    for state in samples[100:]:
+        assert state.yaw == pytest.approx(state.lat % 360, abs=1e-4)
+
+def test_restarted_publisher():
+    buffer = SnapshotBuffer(VehicleState())
+    interpolator = StateInterpolator(buffer)
+    _play(interpolator, buffer, 100)
+    interpolator.buffer = SnapshotBuffer(VehicleState())
+    samples, newest = _play(interpolator, interpolator.buffer, 100, start_step=10000)
+    assert 10000 < samples[-1].lat <= newest
@@ -0,0 +1,80 @@
+import asyncio
+import os
+import select
+import time
+import tty
+import pytest
+from transports import Link, LinkLoop, SerialTransport, open_transport
+
+pytest.importorskip("serial")
+
+class RecordingLink(Link):
+    def __init__(self):
+        super().__init__(lambda payload, msg_id: None, high_water=4096)
+        self.pauses = 0
+        self.resumes = 0
+
+    def pause_writing(self):
+        super().pause_writing()
+        self.pauses += 1
+
+    def resume_writing(self):
+        super().resume_writing()
+        self.resumes += 1
+
+@pytest.fixture
+def pty_link():
+    master, slave = os.openpty()
+    tty.setraw(slave)
+    link_loop = LinkLoop()
+    link = RecordingLink()
+    link_loop.run(open_transport(os.ttyname(slave), 115200, link))
+    link_loop.run(asyncio.sleep(0.01)) # connection_made is scheduled
+    yield link_loop, link, master
+    os.close(master) # Fails pending writes, should a broken transport be stuck in one
+    link_loop.call(link.close)
+    link_loop.close()
+    os.close(slave)
+
+def _fill(link):
+    """Send until the transport buffers, runs on the loop"""
+    async def fill():
+        for _ in range(10000):
+            link.send(bytes(200))
+            await asyncio.sleep(0)
+            if link.pauses:
+                return
+    return fill()
+
+def test_full_port_buffers_and_pauses(pty_link):
+    link_loop, link, master = pty_link
+    link_loop.run(_fill(link), timeout=10)
+    assert isinstance(link.transport, SerialTransport)
+    assert link.pauses == 1
+    assert link.transport.get_write_buffer_size() > 0
+
+    # The loop must stay responsive while the port is full and the transport retries
+    time.sleep(0.1)
+    start = time.perf_counter()
+    link_loop.run(asyncio.sleep(0), timeout=1)
+    assert time.perf_counter() - start < 0.1
+    assert not link.send(bytes(200))
+    assert link.dropped > 0
+
+def test_resumes_and_delivers_everything_once_drained(pty_link):
+    link_loop, link, master = pty_link
+    link_loop.run(_fill(link), timeout=10)
+
+    received = 0
+    deadline = time.monotonic() + 10
+    while time.monotonic() < deadline:
+        if select.select([master], [], [], 0.01)[0]:
+            received += len(os.read(master, 65536))
+        if link.resumes and received == link.bytes_sent:
+            break
+    assert link.resumes == 1
+    assert received == link.bytes_sent
+    assert link_loop.run(_buffer_size(link)) == 0
+
+async def _buffer_size(link):
+    return link.transport.get_write_buffer_size()
@@ -0,0 +1,74 @@
+import math
+import pytest
+import utils
+from data_structures import *
+
+def _angle_diff(a, b):
+    return (a - b + 180) % 360 - 180
+
+def _same_rotation(q0, q1):
+    return abs(math.fsum(a * b for a, b in zip(q0, q1))) == pytest.approx(1.0)
+
+@pytest.mark.parametrize("roll, pitch, yaw", [(0, 0, 0), (30, -20, 45), (-170, 80, 359), (90, 10, 180)])
+def test_quaternion_round_trip(roll, pitch, yaw):
+    q = utils.euler_to_quaternion(roll, pitch, yaw)
+    assert math.fsum(c * c for c in q) == pytest.approx(1.0)
+    for a, b in zip(utils.quaternion_to_euler(q), (roll, pitch, yaw)):
+        assert _angle_diff(a, b) == pytest.approx(0, abs=1e-9)
+
+def test_slerp_end_points_and_unit_length():
+    q0 = utils.euler_to_quaternion(10, 20, 30)
+    q1 = utils.euler_to_quaternion(-40, 5, 200)
+    assert _same_rotation(utils.slerp(q0, q1, 0), q0)
+    assert _same_rotation(utils.slerp(q0, q1, 1), q1)
+    for t in (0.1, 0.5, 0.9):
+        assert math.fsum(c * c for c in utils.slerp(q0, q1, t)) == pytest.approx(1.0)
+
+def test_slerp_turns_at_constant_rate():
+    q0 = utils.euler_to_quaternion(0, 0, 0)
+    q1 = utils.euler_to_quaternion(0, 0, 120)
+    for t in (0.25, 0.5, 0.75):
+        assert utils.quaternion_to_euler(utils.slerp(q0, q1, t))[2] == pytest.approx(120 * t)
+
+def test_slerp_takes_the_shorter_arc():
+    q0 = utils.euler_to_quaternion(0, 0, 350)
+    q1 = utils.euler_to_quaternion(0, 0, 10)
+    assert _angle_diff(utils.quaternion_to_euler(utils.slerp(q0, q1, 0.5))[2], 0) == pytest.approx(0, abs=1e-9)
+
+def test_slerp_nearly_parallel():
+    q0 = utils.euler_to_quaternion(0, 0, 0)
+    q1 = utils.euler_to_quaternion(0, 0, 0.01)
+    assert utils.quaternion_to_euler(utils.slerp(q0, q1, 0.5))[2] == pytest.approx(0.005)
+
+def test_interpolate_state():
+    s0 = VehicleState(roll=0, pitch=0, yaw=355, lat=1.0, lon=2.0, alt=100.0)
+    s1 = VehicleState(roll=20, pitch=0, yaw=5, lat=2.0, lon=4.0, alt=200.0)
+    state = utils.interpolate_state(s0, s1, 0.25)
+    assert (state.lat, state.lon, state.alt) == pytest.approx((1.25, 2.5, 125.0))
+    assert state.roll == pytest.approx(5, abs=0.1)
+    assert _angle_diff(state.yaw, 357.5) == pytest.approx(0, abs=0.1)
+
+def test_grid_chunks_around_point():
+    chunks, bounds = utils.grid_chunks(250.0, -50.0, 100.0, 1)
+    assert sorted(chunks) == [(i, j) for i in (1, 2, 3) for j in (-2, -1, 0)]
+    assert bounds == (100.0, -200.0, 400.0, 100.0)
+
+def test_grid_chunks_count_stays_constant():
+    for x, y in [(0.0, 0.0), (99.9, 0.0), (100.0, 0.0), (-0.1, -1e6), (12345.6, 7890.1)]:
+        chunks, _ = utils.grid_chunks(x, y, 100.0, 3)
+        assert len(chunks) == 49
+        assert len(set(chunks)) == 49
+
+def test_grid_chunks_leave_out_finer_level():
+    _, inner = utils.grid_chunks(150.0, 150.0, 200.0, 1)
+    coarse, _ = utils.grid_chunks(150.0, 150.0, 1000.0, 1, inner)
+    # The fine level spans -200 to 400 and covers no whole coarse chunk, so all 9 stay
+    assert len(coarse) == 9
+
+    _, inner = utils.grid_chunks(500.0, 500.0, 200.0, 3)
+    coarse, _ = utils.grid_chunks(500.0, 500.0, 1000.0, 1, inner)
+    assert (0, 0) not in coarse
+    assert len(coarse) == 8
+    for i, j in coarse:
+        # Every coarse chunk left reaches outside the fine area
+        assert not (i * 1000.0 >= inner[0] and j * 1000.0 >= inner[1] and (i + 1) * 1000.0 <= inner[2] and (j + 1) * 1000.0 <= inner[3])
@@ -0,0 +1,51 @@
+import threading
+import time
+from types import SimpleNamespace
+import pytest
+from sim_clock import FastClock, LockstepClock
+from vehicles import VehicleScheduler
+
+ROUND_TRIP = 0.05
+
+class FakeModel:
+    def __init__(self):
+        self.steps = 0
+
+    def sim_time(self):
+        return self.steps * 0.008
+
+    def step(self):
+        self.steps += 1
+
+def _vehicle(name, lockstep=None):
+    return SimpleNamespace(name=name, lockstep=lockstep, fdm=FakeModel())
+
+def _autopilot(lockstep):
+    """Answer every frame after ROUND_TRIP seconds"""
+    def answer():
+        seq = lockstep.take_frame()
+        threading.Timer(ROUND_TRIP, lockstep.advance, (seq,)).start()
+    lockstep.add_listener(answer)
+
+def test_round_trips_overlap():
+    vehicles = [_vehicle("vehicle" + str(index + 1), LockstepClock()) for index in range(4)]
+    for vehicle in vehicles:
+        _autopilot(vehicle.lockstep)
+    scheduler = VehicleScheduler(vehicles, FastClock())
+
+    start = time.perf_counter()
+    for _ in range(3):
+        scheduler.step()
+    elapsed = time.perf_counter() - start
+    assert all(vehicle.fdm.steps == 3 for vehicle in vehicles)
+    assert elapsed < 2 * 3 * ROUND_TRIP # Waiting in turn would take 4 * 3 round trips
+
+def test_unconnected_vehicle_in_lockstep_raises():
+    vehicles = [_vehicle("alpha", LockstepClock()), _vehicle("bravo")]
+    with pytest.raises(ValueError, match="bravo"):
+        VehicleScheduler(vehicles, FastClock())
+
+def test_without_lockstep():
+    vehicles = [_vehicle("alpha"), _vehicle("bravo")]
+    VehicleScheduler(vehicles, FastClock()).run(0.02)
+    assert [vehicle.fdm.steps for vehicle in vehicles] == [3, 3]
@@ -0,0 +1,97 @@
+import math
+from panda3d.core import Geom, GeomLines, GeomNode, GeomVertexData, GeomVertexFormat, GeomVertexWriter, NodePath
+
+class TrailRing:
+    """
+    Fixed capacity line strip in a ring buffer of vertices.
+
+    Line k joins vertex k to vertex k + 1. Appending a point overwrites the
+    oldest vertex, closes the line from the previous point and makes the
+    line from the new point to the now oldest one degenerate, so every
+    append rewrites one vertex and two index pairs however long the trail is.
+    """
+
+    def __init__(self, parent: NodePath, capacity, color, name="trail"):
+        """
+        :param parent: Node the trail is attached to
+        :param capacity: Number of points kept, at most 65535
+        :param color: Line color
+        """
+        self.capacity = capacity
+        self.points = [None] * capacity
+        self.head = -1
+
+        vertex_data = GeomVertexData(name, GeomVertexFormat.getV3(), Geom.UHDynamic)
+        vertex_data.setNumRows(capacity)
+        lines = GeomLines(Geom.UHDynamic)
+        for k in range(capacity):
+            lines.addVertices(k, k)
+        self.geom = Geom(vertex_data)
+        self.geom.addPrimitive(lines)
+        node = GeomNode(name)
+        node.addGeom(self.geom)
+        self.node = parent.attachNewNode(node)
+        self.node.setColor(*color)
+
+    def append(self, point):
+        """
+        Add a point (x, y, z) after the newest one.
+
+        :return: The point that was overwritten, None until the ring is full
+        """
+        head = (self.head + 1) % self.capacity
+        evicted = self.points[head]
+        self.points[head] = point
+
+        vertices = GeomVertexWriter(self.geom.modifyVertexData(), "vertex")
+        vertices.setRow(head)
+        vertices.setData3(*point)
+
+        indices = GeomVertexWriter(self.geom.modifyPrimitive(0).modifyVertices(), 0)
+        if self.head >= 0:
+            indices.setRow(2 * self.head)
+            indices.setData1i(self.head)
+            indices.setData1i(head)
+        indices.setRow(2 * head)
+        indices.setData1i(head)
+        indices.setData1i(head)
+
+        self.head = head
+        return evicted
+
+class Trail:
+    """
+    Flight path of one vehicle.
+
+    Recent points, at least min_distance apart, are kept in one TrailRing.
+    Every decimation-th point that falls out of it moves on to a second,
+    dimmer ring, so the trail covers decimation times further back at the
+    same vertex count and drawing a long mission costs as much as a short one.
+    """
+
+    def __init__(self, parent: NodePath, color, capacity=2048, min_distance=1.0, decimation=16):
+        """
+        :param parent: Node the trail is attached to, usually render
+        :param color: Color of the recent points, older points are drawn at half brightness
+        :param capacity: Points in each of the two rings
+        :param min_distance: Shortest distance between recent points in meters
+        :param decimation: One of this many recent points is kept once it gets old
+        """
+        self.root = parent.attachNewNode("trail")
+        self.recent = TrailRing(self.root, capacity, color, "trail_recent")
+        self.history = TrailRing(self.root, capacity, (color[0] / 2, color[1] / 2, color[2] / 2, color[3]), "trail_history")
+        self.min_distance = min_distance
+        self.decimation = decimation
+        self._last = None
+        self._evicted = 0
+
+    def add(self, x, y, z):
+        """Extend the trail to the vehicle's position, points closer than min_distance to the last one are skipped"""
+        if self._last is not None and math.dist(self._last, (x, y, z)) < self.min_distance:
+            return
+        self._last = (x, y, z)
+        evicted = self.recent.append(self._last)
+        if evicted is not None:
+            self._evicted += 1
+            if self._evicted % self.decimation == 0:
+                self.history.append(evicted)
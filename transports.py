@@ -0,0 +1,333 @@
+import asyncio
+import os
+import threading
+from typing import Callable
+from aplink.aplink_helpers import APLink
+from aplink.aplink_sim_messages import PAYLOAD_LENGTHS
+
+class LinkLoop:
+    """
+    One asyncio event loop in a background thread, shared by every link.
+
+    All transport callbacks and transmit coroutines run in this thread, so a
+    process with several links needs one thread instead of a pair per link.
+    Other threads hand work to it with run() and call().
+    """
+
+    def __init__(self):
+        self.loop = asyncio.new_event_loop()
+        self._thread = threading.Thread(target=self.loop.run_forever, daemon=True)
+        self._thread.start()
+
+    def run(self, coro, timeout=None):
+        """Run a coroutine on the loop and wait for its result"""
+        return asyncio.run_coroutine_threadsafe(coro, self.loop).result(timeout)
+
+    def call(self, callback, *args):
+        """Schedule callback(*args) on the loop, safe to call from any thread"""
+        self.loop.call_soon_threadsafe(callback, *args)
+
+    def close(self):
+        self.loop.call_soon_threadsafe(self.loop.stop)
+        self._thread.join()
+        self.loop.close()
+
+_shared_loop = None
+_shared_loop_lock = threading.Lock()
+
+def shared_link_loop() -> LinkLoop:
+    """The process-wide LinkLoop, started on first use"""
+    global _shared_loop
+    with _shared_loop_lock:
+        if _shared_loop is None:
+            _shared_loop = LinkLoop()
+        return _shared_loop
+
+class Link(asyncio.Protocol, asyncio.DatagramProtocol):
+    """
+    APLink framing over any asyncio transport.
+
+    Received bytes are parsed and every packet is passed to on_packet(payload,
+    msg_id) in the loop thread. send() queues a packet and everything queued
+    during one loop iteration goes out in a single write. While the transport
+    is paused because its buffer passed high_water, send() drops packets
+    instead of queueing them, since a newer sensor frame supersedes an unsent
+    one. All methods must be called from the loop thread.
+    """
+
+    def __init__(self, on_packet: Callable, on_data: Callable = None, high_water=4096):
+        """
+        :param on_packet: Called with (payload, msg_id) for every received packet
+        :param on_data: Called with the raw bytes of every read, before parsing
+        :param high_water: Bytes buffered in the transport before sends are dropped
+        """
+        self.on_packet = on_packet
+        self.on_data = on_data
+        self.high_water = high_water
+        self.aplink = APLink(PAYLOAD_LENGTHS)
+        self.transport = None
+        self.peer = None
+        self._datagram = False
+        self._pending = bytearray()
+        self._flush_scheduled = False
+        self._paused = False
+
+        self.bytes_received = 0
+        self.bytes_sent = 0
+        self.dropped = 0
+
+    def connection_made(self, transport):
+        self.transport = transport
+        # The loops' datagram transports do not subclass asyncio.DatagramTransport
+        self._datagram = hasattr(transport, "sendto")
+        try:
+            transport.set_write_buffer_limits(high=self.high_water)
+        except (AttributeError, NotImplementedError):
+            pass
+
+    def connection_lost(self, exc):
+        self.transport = None
+
+    def data_received(self, data):
+        self.bytes_received += len(data)
+        if self.on_data is not None:
+            self.on_data(data)
+        for payload, msg_id in self.aplink.parse_bytes(data):
+            self.on_packet(payload, msg_id)
+
+    def datagram_received(self, data, addr):
+        # Listening sockets answer whoever sent last
+        self.peer = addr
+        self.data_received(data)
+
+    def error_received(self, exc):
+        pass # ICMP port unreachable while the other end is not up yet
+
+    def pause_writing(self):
+        self._paused = True
+
+    def resume_writing(self):
+        self._paused = False
+
+    def send(self, data) -> bool:
+        """Queue a packet, returns False if it was dropped"""
+        if self.transport is None or self._paused or len(self._pending) + len(data) > self.high_water:
+            self.dropped += 1
+            return False
+        self._pending += data
+        if not self._flush_scheduled:
+            self._flush_scheduled = True
+            asyncio.get_running_loop().call_soon(self._flush)
+        return True
+
+    def _flush(self):
+        self._flush_scheduled = False
+        if self.transport is None or not self._pending:
+            self._pending.clear()
+            return
+        data = bytes(self._pending)
+        self._pending.clear()
+        if self._datagram:
+            if self.transport.get_extra_info("peername") is not None:
+                self.transport.sendto(data)
+            elif self.peer is not None:
+                self.transport.sendto(data, self.peer)
+            else:
+                self.dropped += 1 # Listening and nobody has sent anything yet
+                return
+        else:
+            self.transport.write(data)
+        self.bytes_sent += len(data)
+
+    def close(self):
+        if self.transport is not None:
+            self.transport.close()
+
+class SerialTransport(asyncio.Transport):
+    """
+    asyncio transport for a pyserial port.
+
+    Loops that can watch file descriptors read when data is ready and write
+    straight to the non-blocking descriptor when it can take more. Others,
+    like the Windows proactor loop, get one thread blocking in read(), and
+    writes go through pyserial with a zero write timeout. Writes never block:
+    whatever the driver does not take is buffered and retried, and the
+    protocol is paused while the buffer is above the high-water mark.
+    """
+
+    RETRY_INTERVAL = 0.001
+
+    def __init__(self, loop, protocol, serial_conn, high_water=65536):
+        super().__init__()
+        self._loop = loop
+        self._protocol = protocol
+        self._serial = serial_conn
+        self._buffer = bytearray()
+        self._high_water = high_water
+        self._low_water = high_water // 4
+        self._paused = False
+        self._closing = False
+        self._retry = None
+        self._writing = False
+        self._reader_thread = None
+        self._fd = None
+
+        try:
+            fd = serial_conn.fileno()
+            loop.add_reader(fd, self._read_ready)
+            os.set_blocking(fd, False)
+            self._fd = fd
+        except (NotImplementedError, OSError):
+            serial_conn.timeout = None
+            self._reader_thread = threading.Thread(target=self._read_thread, daemon=True)
+            self._reader_thread.start()
+        loop.call_soon(protocol.connection_made, self)
+
+    def _read_ready(self):
+        try:
+            data = self._serial.read(max(1, self._serial.in_waiting))
+        except OSError as exc:
+            self._fatal(exc)
+            return
+        if data:
+            self._protocol.data_received(data)
+
+    def _read_thread(self):
+        while not self._closing:
+            try:
+                data = self._serial.read(max(1, self._serial.in_waiting))
+            except OSError as exc:
+                if not self._closing:
+                    self._loop.call_soon_threadsafe(self._fatal, exc)
+                return
+            if data:
+                self._loop.call_soon_threadsafe(self._protocol.data_received, data)
+
+    def _write_some(self, data) -> int:
+        """Write what the driver takes without waiting, returns the number of bytes written"""
+        if self._fd is not None:
+            # pyserial's own write() loops until everything is written, even on a non-blocking port
+            try:
+                return os.write(self._fd, data)
+            except BlockingIOError:
+                return 0
+        written = self._serial.write(data)
+        return len(data) if written is None else written
+
+    def write(self, data):
+        if self._closing:
+            return
+        if not self._buffer:
+            try:
+                written = self._write_some(data)
+            except OSError as exc:
+                self._fatal(exc)
+                return
+            if written == len(data):
+                return
+            data = data[written:]
+        self._buffer += data
+        self._wait_writable()
+        if not self._paused and len(self._buffer) > self._high_water:
+            self._paused = True
+            self._protocol.pause_writing()
+
+    def _wait_writable(self):
+        if self._fd is not None:
+            if not self._writing:
+                self._loop.add_writer(self._fd, self._write_ready)
+                self._writing = True
+        elif self._retry is None:
+            self._retry = self._loop.call_later(self.RETRY_INTERVAL, self._write_ready)
+
+    def _write_ready(self):
+        self._retry = None
+        try:
+            written = self._write_some(self._buffer)
+        except OSError as exc:
+            self._fatal(exc)
+            return
+        del self._buffer[:written]
+        if self._buffer:
+            self._wait_writable()
+        elif self._writing:
+            self._loop.remove_writer(self._fd)
+            self._writing = False
+        if self._paused and len(self._buffer) <= self._low_water:
+            self._paused = False
+            self._protocol.resume_writing()
+        if self._closing and not self._buffer:
+            self._finish_close(None)
+
+    def get_write_buffer_size(self):
+        return len(self._buffer)
+
+    def set_write_buffer_limits(self, high=None, low=None):
+        self._high_water = 65536 if high is None else high
+        self._low_water = self._high_water // 4 if low is None else low
+
+    def is_closing(self):
+        return self._closing
+
+    def close(self):
+        if self._closing:
+            return
+        self._closing = True
+        if not self._buffer:
+            self._finish_close(None)
+
+    def abort(self):
+        self._closing = True
+        self._finish_close(None)
+
+    def _fatal(self, exc):
+        self._closing = True
+        self._finish_close(exc)
+
+    def _finish_close(self, exc):
+        if self._serial is None:
+            return
+        if self._retry is not None:
+            self._retry.cancel()
+            self._retry = None
+        if self._writing:
+            self._loop.remove_writer(self._fd)
+            self._writing = False
+        if self._reader_thread is None:
+            self._loop.remove_reader(self._fd)
+        else:
+            self._serial.cancel_read()
+        self._serial.close()
+        self._serial = None
+        self._buffer.clear()
+        self._loop.call_soon(self._protocol.connection_lost, exc)
+
+def _split_address(address):
+    host, _, port = address.rpartition(":")
+    return host, int(port)
+
+async def open_transport(port: str, baud_rate: int, protocol: Link):
+    """
+    Connect protocol to a link.
+
+    :param port: Serial port name, "udp://host:port" to send to a remote
+        socket, "udp://:port" to listen and answer the last sender, or
+        "tcp://host:port"
+    :param baud_rate: Baud rate, only used by serial ports
+    :param protocol: Link that handles the traffic
+    :raises OSError: When the link cannot be opened
+    """
+    loop = asyncio.get_running_loop()
+    if port.startswith("udp://"):
+        host, number = _split_address(port[len("udp://"):])
+        if host:
+            await loop.create_datagram_endpoint(lambda: protocol, remote_addr=(host, number))
+        else:
+            await loop.create_datagram_endpoint(lambda: protocol, local_addr=("0.0.0.0", number))
+    elif port.startswith("tcp://"):
+        host, number = _split_address(port[len("tcp://"):])
+        await loop.create_connection(lambda: protocol, host, number)
+    else:
+        import serial # Only needed when hardware is attached
+
+        SerialTransport(loop, protocol, serial.Serial(port, baud_rate, timeout=0, write_timeout=0))
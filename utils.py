@@ -60,4 +60,125 @@ def map_range(x, a1, a2, b1, b2):
     if x >= a2:
         return b2
 
-    return b1 + (x - a1) * (b2 - b1) / (a2 - a1)
\ No newline at end of file
+    return b1 + (x - a1) * (b2 - b1) / (a2 - a1)
+
+def camera_pose(lat, lon, alt, roll, pitch, yaw, center_lat, center_lon):
+    """
+    Convert a vehicle state to a Panda3D camera pose.
+    
+    :param lat: Latitude of the vehicle in degrees
+    :param lon: Longitude of the vehicle in degrees
+    :param alt: Altitude of the vehicle in meters
+    :param roll: Roll in degrees
+    :param pitch: Pitch in degrees
+    :param yaw: Yaw in degrees
+    :param center_lat: Latitude of the scene origin in degrees
+    :param center_lon: Longitude of the scene origin in degrees
+    :return: A tuple ((h, p, r), (x, y, z)) with x east, y north and z up
+    """
+    north, east = calculate_north_east(lat, lon, center_lat, center_lon)
+    return (-yaw, pitch, roll), (east, north, alt)
+
+def euler_to_quaternion(roll, pitch, yaw):
+    """
+    Convert aerospace Euler angles (yaw, then pitch, then roll) to a unit quaternion.
+    
+    :param roll: Roll in degrees
+    :param pitch: Pitch in degrees
+    :param yaw: Yaw in degrees
+    :return: A tuple (w, x, y, z)
+    """
+    cr, sr = math.cos(math.radians(roll) / 2), math.sin(math.radians(roll) / 2)
+    cp, sp = math.cos(math.radians(pitch) / 2), math.sin(math.radians(pitch) / 2)
+    cy, sy = math.cos(math.radians(yaw) / 2), math.sin(math.radians(yaw) / 2)
+    return (
+        cr * cp * cy + sr * sp * sy,
+        sr * cp * cy - cr * sp * sy,
+        cr * sp * cy + sr * cp * sy,
+        cr * cp * sy - sr * sp * cy,
+    )
+
+def quaternion_to_euler(q):
+    """
+    Convert a unit quaternion to aerospace Euler angles.
+    
+    :param q: A tuple (w, x, y, z)
+    :return: A tuple (roll, pitch, yaw) in degrees, yaw from 0 to 360
+    """
+    w, x, y, z = q
+    roll = math.atan2(2 * (w * x + y * z), 1 - 2 * (x * x + y * y))
+    pitch = math.asin(max(-1.0, min(1.0, 2 * (w * y - z * x))))
+    yaw = math.atan2(2 * (w * z + x * y), 1 - 2 * (y * y + z * z))
+    return math.degrees(roll), math.degrees(pitch), math.degrees(yaw) % 360
+
+def slerp(q0, q1, t):
+    """
+    Spherical linear interpolation between two unit quaternions along the shorter arc.
+    
+    :param q0: Quaternion (w, x, y, z) at t = 0
+    :param q1: Quaternion (w, x, y, z) at t = 1
+    :param t: Interpolation factor from 0 to 1
+    :return: The interpolated unit quaternion
+    """
+    dot = sum(a * b for a, b in zip(q0, q1))
+    if dot < 0:
+        q1 = tuple(-b for b in q1)
+        dot = -dot
+
+    if dot > 0.9995: # Nearly parallel, fall back to a normalised lerp
+        q = tuple(a + t * (b - a) for a, b in zip(q0, q1))
+        norm = math.sqrt(sum(c * c for c in q))
+        return tuple(c / norm for c in q)
+
+    theta = math.acos(dot)
+    s0 = math.sin((1 - t) * theta) / math.sin(theta)
+    s1 = math.sin(t * theta) / math.sin(theta)
+    return tuple(s0 * a + s1 * b for a, b in zip(q0, q1))
+
+def interpolate_state(s0, s1, t):
+    """
+    Interpolate between two vehicle states, linearly in position and by slerp in attitude.
+    
+    :param s0: VehicleState at t = 0
+    :param s1: VehicleState at t = 1
+    :param t: Interpolation factor from 0 to 1
+    :return: A new VehicleState
+    """
+    roll, pitch, yaw = quaternion_to_euler(slerp(
+        euler_to_quaternion(s0.roll, s0.pitch, s0.yaw),
+        euler_to_quaternion(s1.roll, s1.pitch, s1.yaw),
+        t
+    ))
+    return type(s0)(
+        roll=roll,
+        pitch=pitch,
+        yaw=yaw,
+        lat=s0.lat + t * (s1.lat - s0.lat),
+        lon=s0.lon + t * (s1.lon - s0.lon),
+        alt=s0.alt + t * (s1.alt - s0.alt),
+    )
+
+def grid_chunks(x, y, chunk_size, radius, inner=None):
+    """
+    List the square ground chunks around a point.
+    
+    :param x: East position of the point in meters
+    :param y: North position of the point in meters
+    :param chunk_size: Edge length of a chunk in meters
+    :param radius: Number of chunks on each side of the chunk holding the point
+    :param inner: Optional (min_x, min_y, max_x, max_y) area covered by finer chunks, chunks entirely inside it are left out
+    :return: A tuple (chunks, bounds) with chunks the (i, j) indices of the chunks, whose corner is at (i * chunk_size, j * chunk_size), and bounds the area they cover as (min_x, min_y, max_x, max_y)
+    """
+    ci = math.floor(x / chunk_size)
+    cj = math.floor(y / chunk_size)
+    chunks = []
+    for i in range(ci - radius, ci + radius + 1):
+        for j in range(cj - radius, cj + radius + 1):
+            if inner is not None and (
+                i * chunk_size >= inner[0] and j * chunk_size >= inner[1] and
+                (i + 1) * chunk_size <= inner[2] and (j + 1) * chunk_size <= inner[3]
+            ):
+                continue
+            chunks.append((i, j))
+    bounds = ((ci - radius) * chunk_size, (cj - radius) * chunk_size, (ci + radius + 1) * chunk_size, (cj + radius + 1) * chunk_size)
+    return chunks, bounds
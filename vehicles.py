@@ -0,0 +1,140 @@
+import math
+import threading
+import time
+from data_structures import *
+from flight_dynamics import FlightDynamicsModel
+from hardware_interface import HardwareInterface
+from loop_timing import RateMeter
+from sensor_scheduler import SensorScheduler
+
+def vehicle_configs(params):
+    """
+    Read the vehicle list from config.json.
+
+    Every entry of "vehicles" may set "name", "serial_port", "baud_rate",
+    "model", "lat" and "lon", missing keys are taken from the top level of
+    the config. Without a "vehicles" list there is one vehicle.
+    """
+    entries = params.get("vehicles", [{}])
+    configs = []
+    for index, entry in enumerate(entries):
+        configs.append({
+            "name": "vehicle" + str(index + 1) if len(entries) > 1 else "vehicle",
+            "serial_port": params["serial_port"],
+            "baud_rate": params["baud_rate"],
+            "model": params["model"],
+            "lat": params["initial_conditions"]["lat"],
+            "lon": params["initial_conditions"]["lon"],
+            **entry,
+        })
+    if len({config["name"] for config in configs}) != len(configs):
+        raise ValueError("Vehicle names must be unique")
+    return configs
+
+class Vehicle:
+    """One simulated aircraft with its own state buffers, sensor scheduler, autopilot link and JSBSim instance"""
+
+    def __init__(self, config, params, lockstep=None, capture=None, timing=None, vehicle_state=None):
+        """
+        :param config: Entry of vehicle_configs()
+        :param params: The whole config.json, for the sensor settings
+        :param lockstep: LockstepClock of this vehicle's link, None when not in lockstep
+        :param capture: CaptureWriter for this vehicle's link
+        :param timing: LoopTiming for this vehicle's link
+        :param vehicle_state: Buffer the state is published to, e.g. a SharedSnapshotBuffer
+        """
+        self.config = config
+        self.name = config["name"]
+        self.lockstep = lockstep
+        self.control_input = SnapshotBuffer(ControlInput())
+        self.simulated_sensors = SnapshotBuffer(SimulatedSensors())
+        self.vehicle_state = vehicle_state if vehicle_state is not None else SnapshotBuffer(VehicleState())
+        self.sensor_scheduler = SensorScheduler(params["sensor_rates"], params["gps_latency"])
+        self.hardware = HardwareInterface(self.control_input, self.simulated_sensors, lockstep, self.sensor_scheduler, capture, timing)
+        self.fdm = None
+
+    def connect(self) -> bool:
+        return self.hardware.connect(self.config["serial_port"], self.config["baud_rate"])
+
+    def load_model(self, controls: SnapshotBuffer = None, recorder=None, debug_level=1, state_bus=None):
+        """
+        Create the flight dynamics model, it is stepped by a VehicleScheduler.
+
+        :param controls: Buffer the model reads its controls from, the link's control input when None
+        :param state_bus: This vehicle's VehicleBusWriter
+        """
+        self.fdm = FlightDynamicsModel(
+            self.config["lat"],
+            self.config["lon"],
+            controls if controls is not None else self.control_input,
+            self.simulated_sensors,
+            self.vehicle_state,
+            sensor_scheduler=self.sensor_scheduler,
+            autostart=False,
+            model=self.config["model"],
+            debug_level=debug_level,
+            recorder=recorder,
+            state_bus=state_bus
+        )
+
+class VehicleScheduler:
+    """
+    Steps the models of all vehicles in one physics thread.
+
+    The clock paces the shared simulation time. In lockstep every vehicle
+    has its own LockstepClock: the sensor frames of all vehicles are sent
+    before waiting for any of the replies, so the autopilots work in
+    parallel and a step waits as long as the slowest round trip, not the
+    sum of them.
+    """
+
+    def __init__(self, vehicles, clock, timing=None):
+        """
+        :param vehicles: Vehicles with their models loaded, either all or none of them in lockstep
+        :param clock: Clock pacing the simulation time, e.g. a FastClock in lockstep
+        :param timing: LoopTiming for the physics histograms
+        """
+        in_lockstep = [vehicle.name for vehicle in vehicles if vehicle.lockstep is not None]
+        if in_lockstep and len(in_lockstep) != len(vehicles):
+            free = [vehicle.name for vehicle in vehicles if vehicle.lockstep is None]
+            raise ValueError("Lockstep needs the autopilot of every vehicle, " + ", ".join(free) + " would run free")
+        self.vehicles = vehicles
+        self.clock = clock
+        self.timing = timing
+
+    def start(self):
+        self.clock.start()
+        self._thread = threading.Thread(target=self.run, daemon=True)
+        self._thread.start()
+
+    def sim_time(self):
+        return self.vehicles[0].fdm.sim_time()
+
+    def step(self):
+        for vehicle in self.vehicles:
+            if vehicle.lockstep is not None:
+                vehicle.lockstep.request_frame()
+        for vehicle in self.vehicles:
+            if vehicle.lockstep is not None:
+                vehicle.lockstep.wait()
+            vehicle.fdm.step()
+
+    def run(self, end_time=math.inf):
+        """Step every vehicle, paced by the clock, until end_time in simulation time"""
+        if self.timing is None:
+            while self.sim_time() < end_time:
+                self.clock.wait_until(self.sim_time())
+                self.step()
+            return
+
+        step_duration = self.timing.histogram("physics.step")
+        overrun = self.timing.histogram("physics.deadline_overrun")
+        rate = RateMeter(self.timing.histogram("physics.real_time_factor", 1e-3, 1e3))
+        while self.sim_time() < end_time:
+            late = self.clock.wait_until(self.sim_time())
+            start = time.perf_counter()
+            self.step()
+            step_duration.record(time.perf_counter() - start)
+            if late is not None:
+                overrun.record(late)
+            rate.update(self.sim_time())
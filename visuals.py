@@ -1,17 +1,28 @@
 from panda3d.core import LineSegs, WindowProperties
 from direct.showbase.ShowBase import ShowBase
-from panda3d.core import LineSegs, NodePath
+from panda3d.core import ClockObject, LineSegs, NodePath
 from direct.showbase.ShowBase import ShowBase
-import numpy as np
 import utils
 from data_structures import *
+from ground import GroundGrid
+from state_interpolation import StateInterpolator
+from trail import Trail
+
+MARKER_COLORS = [(1, 0.3, 0.3, 1), (0.3, 1, 0.3, 1), (0.3, 0.6, 1, 1), (1, 1, 0.3, 1), (1, 0.3, 1, 1), (0.3, 1, 1, 1)]
 
 class Visuals(ShowBase):
-    def __init__(self, center_lat, center_lon, vehicle_state: VehicleState, mouse_keyboard_controls: ControlInput):
+    def __init__(self, center_lat, center_lon, vehicle_states: list, mouse_keyboard_controls: SnapshotBuffer, max_fps=60, interpolation_delay=0.03):
+        """
+        :param vehicle_states: One VehicleState buffer per vehicle
+        :param max_fps: Frame rate cap, None or 0 draws as fast as possible
+        :param interpolation_delay: How far behind the physics the vehicles are drawn in seconds, see StateInterpolator
+        """
         ShowBase.__init__(self)
         self.center_lat = center_lat
         self.center_lon = center_lon
-        self.vehicle_state = vehicle_state
+        self.vehicle_states = vehicle_states
+        self.interpolators = [StateInterpolator(buffer, delay=interpolation_delay) for buffer in vehicle_states]
+        self.followed = 0
         self.mouse_keyboard_controls = mouse_keyboard_controls
 
         props = WindowProperties()
@@ -20,66 +31,99 @@ class Visuals(ShowBase):
 
         self.disableMouse()
 
-        self.create_ground()
+        self.clock = ClockObject.getGlobalClock()
+        if max_fps:
+            self.clock.setMode(ClockObject.MLimited)
+            self.clock.setFrameRate(max_fps)
+
+        self.ground = GroundGrid(self.render)
+        self.markers = [self.create_marker(MARKER_COLORS[i % len(MARKER_COLORS)]) for i in range(len(vehicle_states))]
+        self.markers[self.followed].hide()
+        self.trails = [Trail(self.render, MARKER_COLORS[i % len(MARKER_COLORS)]) for i in range(len(vehicle_states))]
 
         self.taskMgr.add(self.update_flight, "update_flight")
 
         self.accept("w", self.increase_throttle)
         self.accept("s", self.decrease_throttle)
+        self.accept("tab", self.follow_next)
+        self.accept("t", self.toggle_trails)
     
-    def create_ground(self):
-        """Create an infinite flat grid."""
-        # Define the size of each grid cell
-        self.spacing = 10.0  # Distance between grid lines
-        
-        # Define how many grid lines to draw in each direction from center
-        grid_lines = 100  # Number of grid lines in each direction
-        
-        # Calculate the total size to render
-        total_size = grid_lines * self.spacing
-        
-        # Create a LineSegs object to draw the lines
+    def create_marker(self, color):
+        """Wireframe aircraft shown for the vehicles the camera is not following"""
         lines = LineSegs()
-        lines.set_color(1, 1, 1, 1)  # Set the color of the lines (white)
-        
-        # Draw grid lines along X-axis (east-west)
-        for i in range(-grid_lines, grid_lines + 1):
-            x = i * self.spacing
-            lines.move_to(x, -total_size, 0)
-            lines.draw_to(x, total_size, 0)
-        
-        # Draw grid lines along Y-axis (north-south)
-        for i in range(-grid_lines, grid_lines + 1):
-            y = i * self.spacing
-            lines.move_to(-total_size, y, 0)
-            lines.draw_to(total_size, y, 0)
-        
-        # Create a NodePath to hold the lines
-        lines_node = lines.create()
-        lines_np = NodePath(lines_node)
-        lines_np.reparent_to(self.render)
-    
+        lines.set_color(*color)
+        lines.set_thickness(2)
+        lines.move_to(0, -1, 0) # Fuselage, nose along +y
+        lines.draw_to(0, 1, 0)
+        lines.move_to(-1.5, 0.2, 0) # Wing
+        lines.draw_to(1.5, 0.2, 0)
+        lines.move_to(-0.5, -1, 0) # Tail
+        lines.draw_to(0.5, -1, 0)
+        lines.move_to(0, -1, 0) # Fin
+        lines.draw_to(0, -1, 0.5)
+
+        marker = NodePath(lines.create())
+        marker.reparent_to(self.render)
+        return marker
+
+    def follow_next(self):
+        """Move the camera to the next vehicle"""
+        self.markers[self.followed].show()
+        self.followed = (self.followed + 1) % len(self.vehicle_states)
+        self.markers[self.followed].hide()
+
+    def toggle_trails(self):
+        """Show or hide the flight paths"""
+        for trail in self.trails:
+            if trail.root.isHidden():
+                trail.root.show()
+            else:
+                trail.root.hide()
+
     def update_flight(self, task):
-        north, east = utils.calculate_north_east(
-            self.vehicle_state.lat, 
-            self.vehicle_state.lon, 
-            self.center_lat, 
-            self.center_lon
-        )
-
-        self.camera.setHpr(-self.vehicle_state.yaw, self.vehicle_state.pitch, self.vehicle_state.roll)
-        self.camera.setPos(east, north, self.vehicle_state.alt) # xyz
+        dt = self.clock.getDt()
+        for index, interpolator in enumerate(self.interpolators):
+            state = interpolator.sample(dt)
+            hpr, pos = utils.camera_pose(
+                state.lat, 
+                state.lon, 
+                state.alt, 
+                state.roll, 
+                state.pitch, 
+                state.yaw, 
+                self.center_lat, 
+                self.center_lon
+            )
+
+            if index == self.followed:
+                self.camera.setHpr(*hpr)
+                self.camera.setPos(*pos) # xyz
+                self.ground.update(*pos)
+            else:
+                self.markers[index].setHpr(*hpr)
+                self.markers[index].setPos(*pos)
+            self.trails[index].add(*pos)
         
         if self.mouseWatcherNode.hasMouse():
-            self.mouse_keyboard_controls.elevator = self.mouseWatcherNode.getMouseY()
-            self.mouse_keyboard_controls.rudder = self.mouseWatcherNode.getMouseX()
+            controls = self.mouse_keyboard_controls.read()
+            self.mouse_keyboard_controls.publish(ControlInput(
+                elevator=self.mouseWatcherNode.getMouseY(),
+                rudder=self.mouseWatcherNode.getMouseX(),
+                throttle=controls.throttle
+            ))
 
         return task.cont
 
+    def _change_throttle(self, delta):
+        controls = self.mouse_keyboard_controls.read()
+        self.mouse_keyboard_controls.publish(ControlInput(
+            elevator=controls.elevator,
+            rudder=controls.rudder,
+            throttle=max(0, min(1, controls.throttle + delta))
+        ))
+
     def increase_throttle(self):
-        self.mouse_keyboard_controls.throttle += 0.25
-        self.mouse_keyboard_controls.throttle = max(0, min(1, self.mouse_keyboard_controls.throttle))
+        self._change_throttle(0.25)
     
     def decrease_throttle(self):
-        self.mouse_keyboard_controls.throttle -= 0.25
-        self.mouse_keyboard_controls.throttle = max(0, min(1, self.mouse_keyboard_controls.throttle))
\ No newline at end of file
+        self._change_throttle(-0.25)
\ No newline at end of file